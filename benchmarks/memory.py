@@ -0,0 +1,208 @@
+"""Memory benchmark: peak and retained memory for parsing synthetic listing pages of increasing size.
+
+Each measurement runs in forked processes so peak RSS isn't shared between scenarios. Reported per scenario:
+
+* peak: highest RSS above the baseline while parsing, without holding on to the parsed documents. It is
+  measured in a process of its own, since CPython doesn't hand freed memory back to the system and the
+  peak of a process that then holds the documents is the RSS it ends up with. The class-level fields
+  still hold each class's last parse, so it is close to held when parsing doesn't need much more than
+  its result
+* held: RSS above the baseline while the parsed documents are still referenced
+* kept trees: lxml trees still alive once the documents are deleted, e.g. through the class-level fields
+  still referencing the last parse. CPython doesn't hand freed memory back to the system, so this is
+  counted from the live objects rather than measured with RSS
+* kept docs: parsed documents still alive once deleted
+* traced peak: peak of Python allocations, when ``tracemalloc`` is available
+
+Fields hold their values at class level, so the documents of the "x N" scenario are each parsed with
+their own copy of the document class, otherwise only the last document's values would be held.
+
+Usage, from the repository root:
+``python benchmarks/memory.py --rows 100,1000,5000 --documents 5 [--max-held-per-row BYTES] [--max-kept-trees N]``
+"""
+
+import argparse
+import copy
+import gc
+import multiprocessing
+import os
+import resource
+import sys
+import weakref
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from lxml import etree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from structominer import (Document, Field, TextField, IntField, URLField, ListField, DictField,
+                          StructuredListField)
+
+
+def synthetic_page(rows):
+    """A listing page with ``rows`` items, with navigation and scripts around it like real pages."""
+    parts = ['<html><head><script>var config = {"tracking": true};</script></head><body>',
+             '<div id="nav">', ''.join('<a href="/section/{0}">Section {0}</a>'.format(i) for i in range(50)),
+             '</div><table id="items">']
+    for i in xrange(rows):
+        parts.append(
+            '<tr class="item"><td class="title"><a href="http://site{0}.example.com/story/{1}">Story number {1}</a>'
+            ' <span class="domain">(site{0}.example.com)</span></td>'
+            '<td class="meta"><span class="score">{1} points</span> by <a class="user" href="/user/u{2}">u{2}</a>'
+            ' <span class="age">{3} hours ago</span></td></tr>'.format(i % 50, i, i % 200, i % 24))
+    parts.append('</table><div id="footer">{0}</div></body></html>'.format('<p>Footer text</p>' * 100))
+    return ''.join(parts)
+
+
+class ListDoc(Document):
+    titles = ListField('//tr[@class="item"]', item=TextField('./td[@class="title"]/a'))
+
+
+class DictDoc(Document):
+    users = DictField('//tr[@class="item"]', key=TextField('./td[@class="title"]/a'),
+                      item=TextField('.//a[@class="user"]'))
+
+
+class StructuredListDoc(Document):
+    items = StructuredListField('//tr[@class="item"]', structure=dict(
+        title=TextField('./td[@class="title"]/a'),
+        url=URLField('./td[@class="title"]/a'),
+        domain=TextField('.//span[@class="domain"]'),
+        points=IntField('.//span[@class="score"]'),
+        user=TextField('.//a[@class="user"]'),
+        age=TextField('.//span[@class="age"]')))
+
+    @items.points.preprocessor
+    def _extract_points(value, **kwargs):
+        return value.split(' ')[0]
+
+
+def copy_document_class(document_class):
+    """A subclass of ``document_class`` with its own copy of each field."""
+    fields = dict((name, copy.deepcopy(attr)) for (name, attr) in vars(document_class).iteritems()
+                  if isinstance(attr, Field))
+    return type(document_class.__name__, (document_class,), fields)
+
+
+def current_rss():
+    """Current resident set size in bytes, None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except IOError:
+        return None
+
+
+def peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def live_trees():
+    """Number of distinct lxml trees that still have live elements."""
+    roots = []
+    for obj in gc.get_objects():
+        if isinstance(obj, etree._Element):
+            root = obj.getroottree().getroot()
+            if not any(root is other for other in roots):
+                roots.append(root)
+    return len(roots)
+
+
+def _document_classes(document_class, documents):
+    return [document_class] + [copy_document_class(document_class) for i in xrange(documents - 1)]
+
+
+def _measure_peak(document_class, html, documents, results):
+    document_classes = _document_classes(document_class, documents)
+    gc.collect()
+    baseline = current_rss()
+    for parsing_class in document_classes:
+        parsing_class(html)
+    peak = peak_rss()
+    results.put(dict(peak=peak - baseline if baseline is not None else peak))
+
+
+def _measure_held(document_class, html, documents, results):
+    document_classes = _document_classes(document_class, documents)
+    gc.collect()
+    baseline = current_rss()
+    baseline_trees = live_trees()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    parsed = [parsing_class(html) for parsing_class in document_classes]
+    gc.collect()
+    held = current_rss()
+    traced_peak = tracemalloc.get_traced_memory()[1] if tracemalloc is not None else None
+    if tracemalloc is not None:
+        tracemalloc.stop()
+    references = [weakref.ref(document) for document in parsed]
+    del parsed
+    gc.collect()
+    results.put(dict(
+        held=held - baseline if baseline is not None else None,
+        kept_trees=live_trees() - baseline_trees,
+        kept_documents=len([reference for reference in references if reference() is not None]),
+        traced_peak=traced_peak))
+
+
+def measure(document_class, html, documents=1):
+    result = {}
+    for target in (_measure_peak, _measure_held):
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(target=target, args=(document_class, html, documents, results))
+        process.start()
+        result.update(results.get())
+        process.join()
+    return result
+
+
+def _kb(size):
+    return '{0:>14.0f}'.format(size / 1024.0) if size is not None else '{0:>14}'.format('-')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure memory used by parsing synthetic listing pages.')
+    parser.add_argument('--rows', default='100,1000,5000', help='comma separated page sizes in rows')
+    parser.add_argument('--documents', type=int, default=5, help='number of parsed documents to hold')
+    parser.add_argument('--max-held-per-row', type=float, default=None,
+                        help='fail if holding one parsed page uses more than this many bytes per row')
+    parser.add_argument('--max-kept-trees', type=int, default=None,
+                        help='fail if more than this many trees per document are still alive once the documents '
+                             'are deleted')
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        ('ListField', ListDoc, 1),
+        ('DictField', DictDoc, 1),
+        ('StructuredListField', StructuredListDoc, 1),
+        ('StructuredListField x{0}'.format(args.documents), StructuredListDoc, args.documents),
+    ]
+    print '{0:<28}{1:>8}{2:>14}{3:>14}{4:>14}{5:>12}{6:>12}{7:>14}'.format(
+        'scenario', 'rows', 'page KB', 'peak KB', 'held KB', 'kept trees', 'kept docs', 'traced KB')
+    failures = []
+    for rows in [int(rows) for rows in args.rows.split(',')]:
+        html = synthetic_page(rows)
+        for name, document_class, documents in scenarios:
+            result = measure(document_class, html, documents)
+            print '{0:<28}{1:>8}{2}{3}{4}{5:>12}{6:>12}{7}'.format(
+                name, rows, _kb(len(html)), _kb(result['peak']), _kb(result['held']), result['kept_trees'],
+                result['kept_documents'], _kb(result['traced_peak']))
+            # Each copy of the document class keeps its own last parse
+            if args.max_kept_trees is not None and result['kept_trees'] > args.max_kept_trees * documents:
+                failures.append('{0} with {1} rows keeps {2} trees alive'.format(name, rows, result['kept_trees']))
+            if args.max_held_per_row is not None and documents == 1 and result['held'] is not None:
+                if result['held'] / float(rows) > args.max_held_per_row:
+                    failures.append('{0} with {1} rows holds {2:.0f} bytes per row'.format(
+                        name, rows, result['held'] / float(rows)))
+    for failure in failures:
+        sys.stderr.write(failure + '\n')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
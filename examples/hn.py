@@ -1,4 +1,5 @@
-from structominer import Document, ErrorHandlingFailure, StructuredListField, TextField, URLField, IntField
+from structominer import (Document, ErrorHandlingFailure, StructuredListField, TextField, URLField, IntField,
+                          RegexField)
 
 class HNHome(Document):
     content_xpath = '//body/center/table[1]'
@@ -13,8 +14,8 @@ class HNHome(Document):
             title=TextField('.//td[3]/a'),
             url=URLField('.//td[3]/a'),
             domain=TextField('.//td[3]/span[@class="comhead"]'),
-            item_id=TextField(item_details + '/span/@id'),
-            points=TextField(item_details + '/span'),
+            item_id=RegexField(item_details + '/span/@id', r'_(\d+)'),
+            points=RegexField(item_details + '/span', r'^\s*(\d+)'),
             user=TextField(item_details + '/a[1]'),
             user_url=URLField(item_details + '/a[1]'),
             age=TextField(item_details + '/text()[position()=last()]'),
@@ -27,14 +28,6 @@ class HNHome(Document):
     def _clean_item_domain(value, **kwargs):
         return value[1:-1] if value is not None else ''
 
-    @items.item_id.postprocessor
-    def _extract_item_id(value, **kwargs):
-        return value.split('_')[1] if value is not None else None
-
-    @items.points.postprocessor
-    def _extract_points(value, **kwargs):
-        return value.split(' ')[0] if value is not None else None
-
     @items.age.postprocessor
     def _extract_age(value, **kwargs):
         duration, unit = value.split(' ', 1)
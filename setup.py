@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
+import re
+
 from setuptools import setup
 
-VERSION = '0.2.0'
+VERSION = re.search(r"__version__ = '([^']+)'", open('structominer/__init__.py').read()).group(1)
 DESC = open('README.rst').read()
 DESC = "\n".join(DESC.split("\n")[5:])  # Remove the header and tag line
 
@@ -21,6 +23,11 @@ setup(
         'lxml',
     ],
 
+    extras_require = {
+        'css': ['cssselect'],
+        'msgpack': ['msgpack'],
+    },
+
     tests_require = [
         'mock',
         'nose',
@@ -28,6 +35,10 @@ setup(
     ],
     test_suite = 'nose.collector',
 
+    entry_points = {
+        'console_scripts': ['structominer = structominer.cli:main'],
+    },
+
     zip_safe = False,
     include_package_data = True,
     package_data = {'': ['LICENSE', 'README.rst']},
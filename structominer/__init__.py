@@ -1,9 +1,17 @@
+__version__ = '0.2.0'
+
 from .document import Document
-from .exc import ParsingError, ErrorHandlingFailure
+from .exc import ParsingError, ErrorHandlingFailure, BudgetExceeded, ParsingCancelled
 from .fields import (
     Field,
     ElementsField, ElementField,
-    StringsField, TextField, IntField, FloatField, DateField, DateTimeField, StructuredTextField,
-    URLField, StructuredField,
+    StringsField, TextField, IntField, FloatField, DateField, DateTimeField, StructuredTextField, RegexField,
+    URLField, JSONField, StructuredField,
     ListField, DictField, StructuredListField, StructuredDictField,
-    ElementsOperation)
+    ElementsOperation, ParsedValue)
+from .cache import ResultCache, MemoryStore, SQLiteStore
+from .schema import Schema
+from .budget import Budget, CancellationToken
+from .util import InternPool
+from .region import Region
+from .page import Page
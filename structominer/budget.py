@@ -0,0 +1,60 @@
+"""Limits on the work a single :meth:`Document.parse` may do, and cooperative cancellation."""
+
+import threading
+import time
+
+from .exc import BudgetExceeded, ParsingCancelled
+
+
+class CancellationToken(object):
+    """Lets any thread stop the parses using it at their next budget check."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Budget(object):
+    """Limits checked by :meth:`Document.parse` between fields and by list and dict fields between items.
+    Exceeding any of them raises :class:`BudgetExceeded`, or :class:`ParsingCancelled` once the token
+    is cancelled. The counters restart each time a document starts parsing.
+
+    :param seconds: Wall clock time allowed for parsing a document
+    :param elements: Total number of elements all fields may select
+    :param items: Total number of list and dict items that may be parsed
+    :param token: A :class:`CancellationToken` shared with the thread that may cancel the parse
+    """
+    def __init__(self, seconds=None, elements=None, items=None, token=None):
+        self.seconds = seconds
+        self.elements = elements
+        self.items = items
+        self.token = token
+        self.start()
+
+    def start(self):
+        self.deadline = time.time() + self.seconds if self.seconds is not None else None
+        self.elements_used = 0
+        self.items_used = 0
+
+    def check(self):
+        if self.token is not None and self.token.cancelled:
+            raise ParsingCancelled('Parsing was cancelled')
+        if self.deadline is not None and time.time() > self.deadline:
+            raise BudgetExceeded('Parsing exceeded its time budget of {0}s'.format(self.seconds))
+
+    def spend_elements(self, count):
+        self.elements_used += count
+        if self.elements is not None and self.elements_used > self.elements:
+            raise BudgetExceeded('Parsing exceeded its budget of {0} elements'.format(self.elements))
+        self.check()
+
+    def spend_items(self, count=1):
+        self.items_used += count
+        if self.items is not None and self.items_used > self.items:
+            raise BudgetExceeded('Parsing exceeded its budget of {0} items'.format(self.items))
+        self.check()
@@ -0,0 +1,226 @@
+"""Caching of parsed values keyed by document definition and page content."""
+
+from collections import OrderedDict
+import cPickle as pickle
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+from . import __version__
+from .fields import Field, UndescribableError, describe
+from .util import dumps
+
+
+# Fingerprints by document class, along with the field definition version they were computed at
+_fingerprints = weakref.WeakKeyDictionary()
+
+
+def fingerprint(document_class):
+    """Returns a digest of the fields defined on ``document_class``, including their processors' code and
+    the values they close over, so that any change in the definition produces a different fingerprint.
+
+    The structominer version is part of the fingerprint, since fields parse differently across versions.
+    Processors are described by their own code only: changes to module level helpers or globals they use
+    aren't noticed, so clear persistent stores after changing those.
+
+    Fingerprints are memoized per class until a processor, filter or map is added to any field.
+    Returns None for classes whose fields use values that can't be described the same way in every
+    process, such as objects whose repr holds their memory address.
+    """
+    try:
+        version, digest = _fingerprints[document_class]
+    except KeyError:
+        pass
+    else:
+        if version == Field._definition_version:
+            return digest
+    version = Field._definition_version
+    fields = sorted(
+        ((name, attr) for (name, attr) in ((name, getattr(document_class, name)) for name in dir(document_class))
+         if isinstance(attr, Field)),
+        key=lambda tupl: tupl[1]._field_counter)
+    try:
+        description = (__version__, document_class.__module__, document_class.__name__,
+                       repr(document_class.region), tuple((name, describe(field)) for (name, field) in fields))
+    except UndescribableError:
+        digest = None
+    else:
+        digest = hashlib.sha1(repr(description)).hexdigest()
+    _fingerprints[document_class] = (version, digest)
+    return digest
+
+
+def content_hash(html):
+    if isinstance(html, unicode):
+        html = html.encode('utf-8')
+    return hashlib.sha1(html).hexdigest()
+
+
+class MemoryStore(object):
+    """An in-memory LRU store holding at most ``max_entries`` results. It pickles empty, e.g. when a
+    :class:`~structominer.schema.Schema` ships it to a worker process, which then has its own entries."""
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return dict(max_entries=self.max_entries)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                data = self._entries.pop(key)
+            except KeyError:
+                return None
+            self._entries[key] = data
+            return data
+
+    def set(self, key, data):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore(object):
+    """An on-disk LRU store backed by a single sqlite file holding at most ``max_entries`` results.
+    It pickles as its path, so worker processes share the file. The connection is opened on first use
+    in each process, as sqlite connections can't be used across a fork."""
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return dict(path=self.path, max_entries=self.max_entries)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connect(self):
+        """Returns the connection of the current process, opening it on first use. Call with the lock held."""
+        if self._pid != os.getpid():
+            # A connection inherited from the parent process is left alone, not even closed
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, data BLOB, accessed REAL)')
+                self._connection.execute(
+                    'CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        return self._connection
+
+    def get(self, key):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                row = connection.execute('SELECT data FROM results WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+                return str(row[0])
+
+    def set(self, key, data):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO results (key, data, accessed) VALUES (?, ?, ?)',
+                    (key, sqlite3.Binary(data), time.time()))
+                connection.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY accessed DESC, rowid DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute('DELETE FROM results')
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class ResultCache(object):
+    """Returns previously parsed values for pages whose content was already parsed by the same
+    :class:`Document` definition. Assign an instance to :attr:`Document.cache` or pass it to the document.
+
+    Results are keyed by the document's :func:`fingerprint` and the :func:`content_hash` of the page,
+    so changing any field definition automatically invalidates the cached results. Documents without
+    a fingerprint are never cached, and counted as ``uncacheable``.
+
+    :param store: Where the pickled values are kept, :class:`MemoryStore` or :class:`SQLiteStore`.
+        Defaults to a :class:`MemoryStore` with its default size.
+    """
+    def __init__(self, store=None):
+        self.store = store if store is not None else MemoryStore()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+    def __getstate__(self):
+        # The counters are per process
+        return dict(store=self.store)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def key(self, document, html):
+        """Returns the key of the page's values, or None if the document can't be cached."""
+        digest = fingerprint(document.__class__)
+        if digest is None:
+            return None
+        return '{0}:{1}'.format(digest, content_hash(html))
+
+    def get(self, document, html):
+        """Returns the cached values as an :class:`OrderedDict` of field names to values, or None."""
+        key = self.key(document, html)
+        if key is None:
+            self.uncacheable += 1
+            return None
+        data = self.store.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(data)
+
+    def set(self, document, html, values):
+        key = self.key(document, html)
+        if key is None:
+            # Already counted by get
+            return
+        try:
+            data = dumps(values)
+        except (pickle.PicklingError, TypeError):
+            # Values such as lxml elements can't outlive their tree
+            self.uncacheable += 1
+        else:
+            self.store.set(key, data)
+
+    def clear(self):
+        self.store.clear()
+        self.hits = self.misses = self.uncacheable = 0
+
+    @property
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, uncacheable=self.uncacheable, size=len(self.store))
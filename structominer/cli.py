@@ -0,0 +1,126 @@
+"""Command line bulk extraction of saved pages into NDJSON.
+
+Usage: ``structominer module:DocumentClass pages/ more/*.html -j 4 -o results.ndjson``
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+from StringIO import StringIO
+import sys
+import time
+
+from .serialize import dump_json
+
+
+PAGE_EXTENSIONS = ('.html', '.htm', '.xhtml')
+
+
+def load_document_class(path):
+    """Imports a document class given as ``module:DocumentClass``."""
+    module_name, _, class_name = path.partition(':')
+    if not module_name or not class_name:
+        raise ValueError('Expected module:DocumentClass, got "{0}"'.format(path))
+    obj = importlib.import_module(module_name)
+    for name in class_name.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def find_pages(inputs):
+    """Yields the paths of the pages to parse, expanding directories and glob patterns in order.
+    The path ``-`` stands for the standard input."""
+    for path in inputs:
+        if path == '-':
+            yield path
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(PAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif os.path.exists(path):
+            yield path
+        else:
+            for match in sorted(glob.glob(path)):
+                yield match
+
+
+_document_class = None
+
+
+def _init_worker(document_path):
+    global _document_class
+    _document_class = load_document_class(document_path)
+
+
+def _extract(task):
+    """Parses one page, returning its source, size in bytes, NDJSON line and whether it failed."""
+    source, html = task
+    try:
+        if html is None:
+            with open(source, 'rb') as f:
+                html = f.read()
+        document = _document_class(html)
+        line = StringIO()
+        line.write('{{"source":{0},"values":'.format(json.dumps(source)))
+        dump_json(document, line)
+        line.write('}')
+        return source, len(html), line.getvalue(), False
+    except Exception as e:
+        error = '{0}: {1}'.format(e.__class__.__name__, e)
+        return source, len(html or ''), json.dumps(dict(source=source, error=error)), True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='structominer',
+        description='Parse saved pages with a Document class and write one JSON object per page.')
+    parser.add_argument('document', help='the document class to parse with, as module:DocumentClass')
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help='files, directories or glob patterns of pages to parse, - for stdin (default)')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='number of worker processes (default: 1)')
+    parser.add_argument('-o', '--output', default='-', help='file to write the NDJSON to (default: stdout)')
+    args = parser.parse_args(argv)
+    try:
+        # Fail here rather than in every worker, which the pool would keep replacing
+        load_document_class(args.document)
+    except (ImportError, AttributeError, ValueError) as e:
+        parser.error('cannot load document class "{0}": {1}'.format(args.document, e))
+
+    tasks = ((source, sys.stdin.read() if source == '-' else None) for source in find_pages(args.inputs))
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(args.document,))
+        results = pool.imap(_extract, tasks, chunksize=4)
+    else:
+        pool = None
+        _init_worker(args.document)
+        results = (_extract(task) for task in tasks)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    pages = size = errors = 0
+    start = time.time()
+    try:
+        for source, page_size, line, failed in results:
+            output.write(line + '\n')
+            pages += 1
+            size += page_size
+            errors += failed
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = max(time.time() - start, 1e-9)
+
+    sys.stderr.write('{0} pages, {1} bytes, {2} errors in {3:.2f}s: {4:.1f} pages/s, {5:.0f} bytes/s\n'.format(
+        pages, size, errors, elapsed, pages / elapsed, size / elapsed))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,13 @@
 """The parent class for all parsers."""
 
 from collections import OrderedDict, Mapping
+import cPickle as pickle
 import inspect
-from lxml import etree
 
-from .fields import BiaxialAccessContainer, Field
+from .exc import BudgetExceeded
+from .fields import BiaxialAccessContainer, Field, ParsedValue, ListField, DictField
+from .page import Page, build_etree
+from .util import InternPool, dumps
 
 
 class Document(BiaxialAccessContainer, Mapping):
@@ -18,12 +21,44 @@ class Document(BiaxialAccessContainer, Mapping):
     * Attribute access is not explicitly mixed in but fields are already
       defined as attributes of the document: ``doc.field``
 
-    :param html: HTML content to parse.
+    :param html: HTML content or a :class:`~structominer.page.Page` to parse.
         Optional, if present it will use it to call :meth:`parse`
+    :param cache: A :class:`~structominer.cache.ResultCache` to use instead of the class level :attr:`cache`
+    :param budget: A :class:`~structominer.budget.Budget` to use instead of the class level :attr:`budget`
+    :param allow_partial: Overrides the class level :attr:`allow_partial`
+    :param intern_pool: The :class:`~structominer.util.InternPool` used by fields with ``intern=True``.
+        Pass the same pool to several documents to share values across a batch, otherwise each
+        document gets its own.
+    :param incremental_state: A dict holding the rows that ``incremental`` list and dict fields keep
+        between parses, available as :attr:`incremental_state`. Each document gets its own by default,
+        pass the same dict to documents parsing the same page over time, e.g. one dict per URL.
     """
-    def __init__(self, html=None):
+    #: A :class:`~structominer.cache.ResultCache` shared by all instances, None disables caching
+    cache = None
+    #: A :class:`~structominer.budget.Budget` limiting each parse, None for no limits
+    budget = None
+    #: Whether exceeding the budget stops parsing with the values parsed so far instead of raising
+    allow_partial = False
+    #: A :class:`~structominer.region.Region` of the page holding all the fields, None to parse the whole page
+    region = None
+
+    def __init__(self, html=None, cache=None, budget=None, allow_partial=None, intern_pool=None,
+                 incremental_state=None):
         fields = [(name, attr) for (name, attr) in inspect.getmembers(self, lambda attr: isinstance(attr, Field))]
         self._fields = self._value = OrderedDict(sorted(fields, key=lambda tupl: tupl[1]._field_counter))
+        self.cached = False
+        self.incomplete = False
+        self.budget_error = None
+        self.region_found = None
+        self.page = None
+        self.intern_pool = intern_pool if intern_pool is not None else InternPool()
+        self.incremental_state = incremental_state if incremental_state is not None else {}
+        if cache is not None:
+            self.cache = cache
+        if budget is not None:
+            self.budget = budget
+        if allow_partial is not None:
+            self.allow_partial = allow_partial
         if html:
             self.parse(html)
 
@@ -31,10 +66,104 @@ class Document(BiaxialAccessContainer, Mapping):
         """Executes the parsing mechanism. It looks at each field with auto_parse True in order of
         definition, and calls its :meth:`Field.parse` with the etree and a reference to this document.
 
-        :param html: HTML content to parse, passed through :meth:`etree.HTML`
+        If a :attr:`cache` is set and already holds the values for this content, the fields are not parsed
+        and their values are available as :class:`ParsedValue` objects instead.
+
+        If a :attr:`region` is set, only that slice of the page is parsed into a tree, and :attr:`region_found`
+        tells whether it was found or the whole page was parsed instead.
+
+        If a :attr:`budget` is set it is checked between fields, and by the fields themselves as they select
+        elements and parse items. When it runs out, :class:`~structominer.exc.BudgetExceeded` is raised,
+        unless :attr:`allow_partial` is set: parsing then stops, :attr:`incomplete` is set, list and dict
+        fields keep the items parsed so far and the fields left unparsed have None values.
+
+        Given a :class:`~structominer.page.Page`, the document uses the page's tree and the selections other
+        documents already made from its root, available as :attr:`page`.
+
+        :param html: HTML content to parse, passed through :meth:`etree.HTML`, or a Page
         """
+        self.page = html if isinstance(html, Page) else None
+        if self.page is not None:
+            html = self.page.html
         self.html = html
-        self.etree = etree.HTML(html)
-        for field in self._fields.values():
+        self._value = self._fields
+        self.incomplete = False
+        self.budget_error = None
+        if self.cache is not None:
+            values = self.cache.get(self, html)
+            self.cached = values is not None
+            if self.cached:
+                self.etree = None
+                self._load_values(values)
+                return
+        if self.budget is not None:
+            self.budget.start()
+        # Fields such as anchored JSONFields only read the raw page
+        requires_tree = any(field.requires_tree for field in self._fields.itervalues() if field.auto_parse)
+        self.etree = self._build_etree(html) if requires_tree else None
+        for name, field in self._fields.iteritems():
             if field.auto_parse:
-                field.parse(etree=self.etree, document=self)
+                try:
+                    if self.budget is not None:
+                        self.budget.check()
+                    field.parse(etree=self.etree, document=self)
+                except BudgetExceeded as e:
+                    if not self.allow_partial:
+                        raise
+                    self._stop_parsing(name, e)
+                    return
+        if self.cache is not None:
+            self.cache.set(self, html, self._parsed_values())
+
+    def _build_etree(self, html):
+        """Parses the :attr:`region` of the page if it is set and can be found, otherwise the whole page."""
+        if self.page is not None:
+            tree, found = self.page.etree(self.region)
+        else:
+            tree, found = build_etree(html, self.region)
+        if found is not None:
+            self.region_found = found
+        return tree
+
+    def _stop_parsing(self, name, error):
+        """Replaces the values of the fields from ``name`` onwards, which would otherwise still hold values
+        from a previous parse, keeping only the partial items of a list or dict field interrupted while
+        parsing its items."""
+        self.incomplete = True
+        self.budget_error = error
+        self._value = OrderedDict(self._fields)
+        names = list(self._fields)
+        for later in names[names.index(name):]:
+            field = self._fields[later]
+            if later == name and isinstance(field, (ListField, DictField)) and field.partial:
+                continue
+            if field.auto_parse:
+                self._value[later] = ParsedValue(None)
+
+    def _parsed_values(self):
+        return OrderedDict(
+            (name, self._value[name].value) for (name, field) in self._fields.iteritems() if field.auto_parse)
+
+    def _load_values(self, values):
+        self._value = OrderedDict(self._fields)
+        for name, value in values.iteritems():
+            self._value[name] = ParsedValue(value)
+
+    def __reduce__(self):
+        """Parsed documents pickle as their values, restored as :class:`ParsedValue` objects, along with
+        whether they were :attr:`cached` or :attr:`incomplete`. Values holding lxml elements can't be
+        pickled and raise a PicklingError. Fields that weren't parsed are restored as None."""
+        return _restore_document, (getattr(self, '_schema', None) or self.__class__, dumps(self._parsed_values()),
+                                   self.cached, self.incomplete, self.budget_error)
+
+
+def _restore_document(document_class, values, cached=False, incomplete=False, budget_error=None):
+    if not isinstance(document_class, type):
+        # Documents built from a schema aren't importable, so they carry the schema itself
+        document_class = document_class.document_class()
+    document = document_class()
+    document._load_values(pickle.loads(values))
+    document.cached = cached
+    document.incomplete = incomplete
+    document.budget_error = budget_error
+    return document
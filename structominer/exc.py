@@ -3,3 +3,9 @@ class ParsingError(Exception):
 
 class ErrorHandlingFailure(Exception):
     pass
+
+class BudgetExceeded(ParsingError):
+    pass
+
+class ParsingCancelled(BudgetExceeded):
+    pass
@@ -1,13 +1,22 @@
-from collections import OrderedDict, Mapping, Sequence
+from collections import OrderedDict, Mapping, Sequence, namedtuple
 import copy
+import cPickle as pickle
 import datetime
 import functools
+import hashlib
 import itertools
+import multiprocessing
+import re
 import sys
 import time
+import types
 
-from .exc import ParsingError
-from .util import clean_ascii, clean_strings, element_to_string
+from lxml.etree import tostring
+
+from .exc import BudgetExceeded, ParsingError
+from .selectors import compile_xpath, css_to_xpath
+from .util import (clean_ascii, clean_strings, element_to_string, json_loads, json_decode_at, compile_path,
+                   dumps)
 
 
 class BiaxialAccessContainer(object):
@@ -38,6 +47,13 @@ class BiaxialAccessContainer(object):
     def __len__(self):
         return len(self._value)
 
+    def _release_tree(self):
+        super(BiaxialAccessContainer, self)._release_tree()
+        items = self._value.itervalues() if isinstance(self._value, dict) else self._value or ()
+        for item in items:
+            if isinstance(item, Field):
+                item._release_tree()
+
 
 class TriaxialAccessContainer(BiaxialAccessContainer):
     def _get_structure_definition(self, key):
@@ -53,13 +69,51 @@ class TriaxialAccessContainer(BiaxialAccessContainer):
             raise AttributeError('{0} has no subfield "{1}"'.format(self.__class__.__name__, key))
 
 
+class ParsedValue(object):
+    """Holds a value that was parsed elsewhere (e.g. loaded from a cache) without its field definition.
+    Value access and field access work as they do on fields, nested items are wrapped on demand."""
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, key):
+        try:
+            return ParsedValue(self.value[key])
+        except KeyError:
+            raise KeyError('{0} has no key "{1}"'.format(self.__class__.__name__, key))
+        except IndexError:
+            raise IndexError('{0} has no item "{1}"'.format(self.__class__.__name__, key))
+
+    def __getitem__(self, key):
+        try:
+            return self.value[key]
+        except KeyError:
+            raise KeyError('{0} has no key "{1}"'.format(self.__class__.__name__, key))
+        except IndexError:
+            raise IndexError('{0} has no item "{1}"'.format(self.__class__.__name__, key))
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+
 class Field(object):
     _field_counter = 0
+    # Bumped whenever a processor, filter or map is added to any field, so descriptions can be memoized
+    _definition_version = 0
+    # Whether parsing the field needs the document's tree, as opposed to only its raw content
+    requires_tree = True
+    # Attributes that hold parsing state rather than definition, ignored when fingerprinting a field
+    _runtime_attributes = ('_value', 'etree', 'document')
+    # Attributes shared by the copies of a field rather than copied, e.g. compiled patterns which can't be
+    # deep copied, or what is worked out once from the definition
+    _shared_attributes = ()
 
     def __init__(self, source, auto_parse=True, optional=True, *args, **kwargs):
         if isinstance(source, Field):
             self.source = source
-        elif hasattr(self, 'default_source'):
+        elif getattr(self, 'default_source', None) is not None:
             self.source = self.default_source(source, auto_parse=auto_parse, optional=optional, *args, **kwargs)
         else:
             try:
@@ -68,8 +122,9 @@ class Field(object):
                 raise ValueError('{0} cannot use provided source'.format(self.__class__))
         self.auto_parse = auto_parse
         self.optional = optional
+        self.intern = kwargs.get('intern', False)
 
-        self._value = None
+        self._reset()
         self._preprocessors = []
         self._postprocessors = []
         self._error_handlers = []
@@ -77,6 +132,43 @@ class Field(object):
         self._field_counter = Field._field_counter
         Field._field_counter += 1
 
+    def _reset(self):
+        """Clears the parsing state, keeping only the definition."""
+        self._value = None
+
+    def __deepcopy__(self, memo):
+        for name in self._shared_attributes:
+            attr = self.__dict__.get(name)
+            if attr is not None:
+                memo[id(attr)] = attr
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        for name, attr in self.__dict__.iteritems():
+            copied.__dict__[name] = copy.deepcopy(attr, memo)
+        return copied
+
+    @property
+    def _budget(self):
+        return getattr(self.document, 'budget', None)
+
+    @property
+    def _intern_pool(self):
+        return getattr(self.document, 'intern_pool', None) if self.intern else None
+
+    def _enable_intern(self):
+        """Turns on interning for this field and every field it is built from."""
+        self.intern = True
+        if isinstance(self.source, Field):
+            self.source._enable_intern()
+
+    def _release_tree(self):
+        """Drops the references to the tree kept from parsing, keeping only the value, so fields kept across
+        parses don't hold on to old trees."""
+        self.etree = None
+        if isinstance(self.source, Field):
+            self.source._release_tree()
+            self.source._value = None
+
     @property
     def value(self):
         return self._value
@@ -107,6 +199,8 @@ class Field(object):
         # The main call to the object's _parse
         try:
             value = self._parse(value)
+        except BudgetExceeded:
+            raise
         except Exception as e:
             # Apply error handlers
             for handler in self._error_handlers:
@@ -139,16 +233,19 @@ class Field(object):
 
     def preprocessor(self, fn):
         self._preprocessors.append(fn)
+        Field._definition_version += 1
         return fn
     pre = preprocessor
 
     def postprocessor(self, fn):
         self._postprocessors.append(fn)
+        Field._definition_version += 1
         return fn
     post = postprocessor
 
     def error_handler(self, fn):
         self._error_handlers.append(fn)
+        Field._definition_version += 1
         return fn
     error = error_handler
 
@@ -165,16 +262,89 @@ class Field(object):
         return str(self.source)
 
 
+def _cell_contents(cell):
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # The closed over variable isn't assigned yet
+        return None
+
+
+# Default reprs such as ``<object at 0x7f...>`` differ between processes
+_address = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+class UndescribableError(ValueError):
+    pass
+
+
+def describe(obj, _functions=()):
+    """Builds a hashable description of a field definition, ignoring any parsing state.
+    Functions are described by their code, defaults and the values they close over.
+
+    Raises :class:`UndescribableError` for objects only described by a repr holding a memory address,
+    which wouldn't describe them the same way in another process.
+    """
+    if isinstance(obj, Field):
+        return (obj.__class__.__module__, obj.__class__.__name__, tuple(
+            (name, describe(attr, _functions)) for (name, attr) in sorted(vars(obj).iteritems())
+            if name not in obj._runtime_attributes and name != '_field_counter'))
+    elif isinstance(obj, OrderedDict):
+        return tuple((key, describe(value, _functions)) for (key, value) in obj.iteritems())
+    elif isinstance(obj, dict):
+        return tuple(sorted((key, describe(value, _functions)) for (key, value) in obj.iteritems()))
+    elif isinstance(obj, (list, tuple)):
+        return tuple(describe(item, _functions) for item in obj)
+    elif isinstance(obj, types.FunctionType):
+        if obj in _functions:
+            # Recursive closures
+            return (obj.__module__, obj.__name__)
+        _functions += (obj,)
+        return (obj.__module__, obj.__name__, describe(obj.func_code, _functions),
+                describe(obj.func_defaults, _functions),
+                describe(tuple(_cell_contents(cell) for cell in obj.func_closure or ()), _functions))
+    elif isinstance(obj, functools.partial):
+        return ('functools', 'partial', describe(obj.func, _functions), describe(obj.args, _functions),
+                describe(obj.keywords or {}, _functions))
+    elif isinstance(obj, types.CodeType):
+        return (obj.co_code, obj.co_names, describe(obj.co_consts, _functions))
+    elif isinstance(obj, (type, types.ClassType, types.BuiltinFunctionType)):
+        return (getattr(obj, '__module__', None), obj.__name__)
+    elif hasattr(obj, 'pattern') and hasattr(obj, 'flags'):
+        # Compiled regular expressions
+        return (obj.pattern, obj.flags)
+    description = repr(obj)
+    if _address.search(description):
+        raise UndescribableError('Cannot describe {0}'.format(description))
+    return description
+
+
 class ElementsField(Field):
-    def __init__(self, source, *args, **kwargs):
+    """The ``ElementsField`` selects elements with an XPath expression, compiled once per process and
+    shared by all fields using the same expression. Selections from the root of a
+    :class:`~structominer.page.Page` are shared by all the documents parsing it.
+
+    :param css: Whether the selector is a CSS selector, translated to XPath once when the field is defined.
+        Accepted by all fields built from an ``ElementsField``, requires ``cssselect``.
+    """
+    def __init__(self, source, css=False, *args, **kwargs):
         try:
             selector = unicode(source)
         except Exception:
             raise TypeError('ElementsField expects a string-like selector')
+        if css:
+            selector = css_to_xpath(selector)
         super(ElementsField, self).__init__(source=selector, *args, **kwargs)
+        self.css = css
 
     def _parse(self, selector):
-        elements = self.etree.xpath(selector, smart_strings=False)
+        page = getattr(self.document, 'page', None)
+        if page is not None:
+            elements = page.select(selector, self.etree)
+        else:
+            elements = compile_xpath(selector)(self.etree)
+        if self._budget is not None:
+            self._budget.spend_elements(len(elements) if isinstance(elements, list) else 1)
         if not elements:
             if self.optional:
                 return []
@@ -187,16 +357,25 @@ class ElementsField(Field):
 class StringsField(Field):
     default_source = ElementsField
 
-    def __init__(self, source, recursive=True, filter_empty=True, *args, **kwargs):
+    def __init__(self, source, recursive=True, filter_empty=True, clean=True, *args, **kwargs):
         super(StringsField, self).__init__(source, *args, **kwargs)
         self.recursive = recursive
         self.filter_empty = filter_empty
+        self.clean = clean
 
     def _parse(self, elements):
         strings_selector = 'descendant-or-self::*/text()' if self.recursive else 'text()'
-        strings = [element.xpath(strings_selector) if hasattr(element, 'xpath') else [element]
-                   for element in elements]
-        value = clean_strings(list(itertools.chain.from_iterable(strings)), self.filter_empty)
+        pool = self._intern_pool
+        if pool is None:
+            strings = [element.xpath(strings_selector) if hasattr(element, 'xpath') else [element]
+                       for element in elements]
+            clean_fn = clean_ascii if self.clean else None
+        else:
+            # Plain strings, so that the pool doesn't keep the tree alive through smart strings
+            strings = [element.xpath(strings_selector, smart_strings=False) if hasattr(element, 'xpath')
+                       else [element] for element in elements]
+            clean_fn = pool.clean if self.clean else pool.intern
+        value = clean_strings(list(itertools.chain.from_iterable(strings)), self.filter_empty, clean_fn)
         if not value and not self.optional:
             raise ParsingError('Could not find any strings for source "{0}" starting from {1}'.format(
                 self.source, element_to_string(self.etree)))
@@ -209,15 +388,29 @@ class TextField(Field):
     It accepts all arguments as :class:`StringsField`, as well as:
 
     :param separator: The string to use when joining
+    :param clean: Whether to normalize the strings and the joined text with :func:`clean_ascii`.
+        Also accepted by :class:`StringsField`, where it applies to each string.
+    :param intern: Keep one object per distinct text in the document's :class:`InternPool`, and clean each
+        distinct text only once. Also accepted by every other field, structures pass it on to their items.
     """
     default_source = StringsField
 
-    def __init__(self, source, separator=' ', *args, **kwargs):
-        super(TextField, self).__init__(source, *args, **kwargs)
+    def __init__(self, source, separator=' ', clean=True, *args, **kwargs):
+        super(TextField, self).__init__(source, clean=clean, *args, **kwargs)
         self.separator = separator
+        self.clean = clean
 
     def _parse(self, strings):
-        value = clean_ascii(self.separator.join(strings)).strip() if strings is not None else None
+        pool = self._intern_pool
+        if strings is None:
+            value = None
+        elif not self.clean:
+            value = self.separator.join(strings)
+            value = pool.intern(value) if pool is not None else value
+        elif pool is None:
+            value = clean_ascii(self.separator.join(strings)).strip()
+        else:
+            value = pool.clean(self.separator.join(strings))
         if not value and not self.optional:
             raise ParsingError('Could not find any text for source "{0}" starting from {1}'.format(
                 self.source, element_to_string(self.etree)))
@@ -319,9 +512,72 @@ class DateTimeField(Field):
         return value
 
 
-class StructuredTextField(TextField):
-    """Declares intent to define custom processors that extract information from the element's text."""
-    pass
+class RegexField(TextField):
+    """The ``RegexField`` searches the element's text with a regular expression compiled once per definition.
+    The value depends on the groups in the pattern: a dict of the named groups, the single group's value,
+    a tuple of all the groups, or the whole match if there are none.
+
+    It accepts all arguments as :class:`TextField`, as well as:
+
+    :param pattern: The regular expression, as a string or compiled
+    :param types: Conversion applied to the groups, either a callable such as :class:`int`
+        or a dict mapping group names to callables
+    :param flags: The flags for compiling ``pattern``
+    :param clean: Whether to search the text after :func:`clean_ascii`, off by default so the pattern
+        runs on the raw joined text.
+    """
+    _shared_attributes = ('pattern',)
+
+    def __init__(self, source, pattern=None, types=None, flags=0, clean=None, *args, **kwargs):
+        if clean is None:
+            clean = pattern is None
+        super(RegexField, self).__init__(source, clean=clean, *args, **kwargs)
+        self.pattern = re.compile(pattern, flags) if isinstance(pattern, basestring) else pattern
+        self.types = types
+        if self.pattern is not None:
+            self._group_names = [name for (name, index) in sorted(self.pattern.groupindex.iteritems(),
+                                                                 key=lambda tupl: tupl[1])]
+            if isinstance(types, dict):
+                self._converters = [types.get(name) for name in self._group_names] or \
+                    [None] * max(self.pattern.groups, 1)
+            else:
+                self._converters = [types] * max(self.pattern.groups, 1)
+
+    def _parse(self, strings):
+        text = super(RegexField, self)._parse(strings)
+        if self.pattern is None:
+            return text
+        match = self.pattern.search(text) if text is not None else None
+        if match is None:
+            if self.optional:
+                return None
+            raise ParsingError('Could not match "{0}" in "{1}" for source "{2}" starting from {3}'.format(
+                self.pattern.pattern, text, self.source, element_to_string(self.etree)))
+        if self._group_names:
+            return dict(zip(self._group_names, map(
+                self._convert, self._converters, (match.group(name) for name in self._group_names))))
+        elif self.pattern.groups:
+            values = map(self._convert, self._converters, match.groups())
+            return values[0] if len(values) == 1 else tuple(values)
+        return self._convert(self._converters[0], match.group(0))
+
+    def _convert(self, converter, value):
+        if converter is None or value is None:
+            return value
+        try:
+            return converter(value)
+        except Exception:
+            if self.optional:
+                return None
+            raise ParsingError('Could not convert "{0}" with {1} for source "{2}" starting from {3}'.format(
+                value, converter, self.source, element_to_string(self.etree))), None, sys.exc_info()[2]
+
+
+class StructuredTextField(RegexField):
+    """Declares intent to define custom processors that extract information from the element's text,
+    or to extract it with a ``pattern`` as in :class:`RegexField`."""
+    def __init__(self, source, separator=' ', pattern=None, *args, **kwargs):
+        super(StructuredTextField, self).__init__(source, pattern=pattern, separator=separator, *args, **kwargs)
 
 
 class ElementField(Field):
@@ -360,15 +616,86 @@ class URLField(Field):
         if not value and not self.optional:
             raise ParsingError('Could not find any URL for source "{0}" starting from {1}'.format(
                 self.source, element_to_string(self.etree)))
+        pool = self._intern_pool
+        return pool.intern(value) if pool is not None else value
+
+
+class JSONField(Field):
+    """The ``JSONField`` decodes JSON embedded in the page, as in ``<script type="application/ld+json">``
+    elements or ``window.__STATE__ = {...};`` assignments, without any text cleaning.
+
+    :param source: Selects the element holding the JSON, usually a script, or its text, e.g.
+        ``'//script[@id="state"]/text()'``. The first element or string selected is decoded.
+        Optional with an ``anchor``, the raw page is searched instead and no tree is needed for this field.
+    :param path: Selects into the decoded value using keys and list indices, e.g. ``'props/items/0/name'``
+    :param anchor: A regular expression the JSON value follows, anything after the value is ignored
+    """
+    default_source = ElementsField
+    _shared_attributes = ('anchor',)
+
+    def __init__(self, source=None, path=None, anchor=None, *args, **kwargs):
+        if source is None:
+            if anchor is None:
+                raise ValueError('JSONField expects a source or an anchor')
+            # Search the raw page instead of selecting an element
+            self.default_source = None
+            self.requires_tree = False
+            source = anchor
+        super(JSONField, self).__init__(source, *args, **kwargs)
+        self.anchor = re.compile(anchor) if anchor is not None else None
+        self.path = compile_path(path) if path else ()
+
+    def _parse(self, value):
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if not self.requires_tree:
+            text = self.document.html
+        elif hasattr(value, 'tag'):
+            text = value.text
+        else:
+            text = value
+        try:
+            if not text:
+                raise ValueError('No JSON content')
+            if self.anchor is not None:
+                match = self.anchor.search(text)
+                if match is None:
+                    raise ValueError('Anchor not found')
+                value = json_decode_at(text, match.end())
+            else:
+                value = json_loads(text)
+            for key, index in self.path:
+                value = value[index if index is not None and isinstance(value, list) else key]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            if self.optional:
+                return None
+            raise ParsingError('Could not decode JSON for source "{0}" starting from {1}: {2}'.format(
+                self.source, element_to_string(self.etree) if self.etree is not None else 'the page', e)),\
+                None, sys.exc_info()[2]
         return value
 
 
+def _reject_incremental(fields):
+    """Incremental state is kept per field object, and nested fields are copied for every row and parse."""
+    for field in fields:
+        if getattr(field, 'incremental', False):
+            raise ValueError('incremental is only supported on fields defined directly on a document')
+
+
 class StructuredField(TriaxialAccessContainer, Mapping, Field):
     default_source = ElementField
 
     def __init__(self, source, structure=None, *args, **kwargs):
+        _reject_incremental((structure or {}).itervalues())
         super(StructuredField, self).__init__(source, *args, **kwargs)
         self.structure = structure
+        if self.intern:
+            self._enable_intern()
+
+    def _enable_intern(self):
+        super(StructuredField, self)._enable_intern()
+        for field in (self.structure or {}).itervalues():
+            field._enable_intern()
 
     def _parse(self, element):
         value = OrderedDict()
@@ -376,6 +703,8 @@ class StructuredField(TriaxialAccessContainer, Mapping, Field):
             value[key] = copy.deepcopy(field)
             try:
                 value[key].parse(element, self.document)
+            except BudgetExceeded:
+                raise
             except Exception as e:
                 raise ParsingError('Failed to parse "{0}" for source "{1}": {2}'.format(key, self.source, e.message)),\
                     None, sys.exc_info()[2]
@@ -383,148 +712,501 @@ class StructuredField(TriaxialAccessContainer, Mapping, Field):
 
     @Field.value.getter
     def value(self):
+        if self._value is None:
+            # Not parsed yet
+            return None
         return {key: item.value for (key, item) in self._value.iteritems()}
 
 
+Diff = namedtuple('Diff', 'added removed changed')
+
+
+def row_digest(element):
+    """The default row hash for incremental parsing: a digest of the element's markup without its tail."""
+    if hasattr(element, 'tag'):
+        markup = tostring(element, with_tail=False)
+    else:
+        markup = unicode(element).encode('utf-8')
+    return hashlib.sha1(markup).digest()
+
+
+def _incremental_state(field):
+    """The rows kept from the previous incremental parse of ``field``, held by its document."""
+    return field.document.incremental_state.setdefault(id(field), {})
+
+
+def _reusable_row(previous, used, digest):
+    """Returns the next row kept from the previous parse with ``digest`` that wasn't reused yet, or None.
+    Each kept row is reused once, so identical rows in a page get their own items."""
+    kept = previous.get(digest, ())
+    position = used.get(digest, 0)
+    if position < len(kept):
+        used[digest] = position + 1
+        return kept[position]
+    return None
+
+
+# The list field being sharded and its elements, inherited by the forked worker processes
+_shard_state = None
+
+
+def _parse_shard(bounds):
+    """Returns the pickled values of the accepted items, or None if they hold lxml elements, which can't
+    be sent back."""
+    field, elements = _shard_state
+    values = []
+    for i in xrange(*bounds):
+        item = field._parse_item(i, elements[i])
+        if field._accepts(item):
+            values.append(item.value)
+    try:
+        return dumps(values)
+    except (pickle.PicklingError, TypeError):
+        return None
+
+
 class ListField(BiaxialAccessContainer, Sequence, Field):
+    """A list of ``item`` fields, one for each element selected by the source.
+
+    :param item: The field to deep copy and parse for each element
+    :param incremental: Reuse the items parsed during the previous parse for rows whose source subtree
+        is unchanged, only parsing new rows. Either True to hash rows with :func:`row_digest` or a callable
+        receiving an element and returning a hashable digest. This assumes the item only reads from its
+        row, use a custom digest if it also selects siblings or ancestors.
+        After parsing, :attr:`diff` holds the indices of the ``added`` and ``removed`` items.
+        Rows are identified by content, so a changed row shows up as removed then added.
+        The previous parse is the previous one by the same document, see
+        :attr:`Document.incremental_state`. Kept items drop their references to the tree they were parsed
+        from, so their ``etree`` is None. Only fields defined directly on a document can be incremental,
+        nested fields raise a ValueError when their container is defined.
+    :param processes: Number of worker processes to split the elements across, None parses in process.
+        Workers are forked so they share the parsed tree, and only the values of the accepted items are
+        sent back, as :class:`ParsedValue` objects. Maps and filters run in the workers, so any side
+        effects they have on the document are lost. Lists parsed inside a daemonic process, e.g. a
+        worker of a :class:`multiprocessing.Pool`, are always parsed in process. Chunks whose values hold
+        lxml elements can't be sent back, and are parsed again in process.
+    :param shard_threshold: Minimum number of elements for using the worker processes
+    :param shard_size: Number of elements per chunk, by default each worker gets about four chunks
+    """
     default_source = ElementsField
+    _runtime_attributes = Field._runtime_attributes + ('diff', 'partial')
 
-    def __init__(self, source, item=None, *args, **kwargs):
+    def __init__(self, source, item=None, incremental=False, processes=None, shard_threshold=10000, shard_size=None,
+                 *args, **kwargs):
+        _reject_incremental((item,))
         super(ListField, self).__init__(source, *args, **kwargs)
         self.item = item
+        self.incremental = incremental
+        self.processes = processes
+        self.shard_threshold = shard_threshold
+        self.shard_size = shard_size
         self._filters = []
         self._maps = []
+        if self.intern:
+            self._enable_intern()
+
+    def _enable_intern(self):
+        super(ListField, self)._enable_intern()
+        if self.item is not None:
+            self.item._enable_intern()
+
+    def _reset(self):
+        super(ListField, self)._reset()
+        self.diff = None
+        self.partial = False
+
+    def parse(self, etree, document):
+        # Set again when the budget runs out while parsing the items
+        self.partial = False
+        return super(ListField, self).parse(etree, document)
 
     def _parse(self, elements):
+        if self.incremental:
+            return self._parse_incremental(elements)
+        # Daemonic processes, such as the workers of the command line extractor, can't have children
+        if self.processes and len(elements) >= self.shard_threshold and \
+                not multiprocessing.current_process().daemon:
+            return self._parse_sharded(elements)
         value = []
-        for i, element in enumerate(elements):
-            item = copy.deepcopy(self.item)
-            try:
-                item.parse(element, self.document)
-            except Exception as e:
-                raise ParsingError('Failed to parse item {0} for source "{1}": {2}'.format(i, self.source, e.message)),\
-                    None, sys.exc_info()[2]
-            # Apply all the maps in definition order
-            map(lambda map_fn: map_fn(
-                    value=item.value,
-                    item=item,
-                    field=self,
-                    etree=self.etree,
-                    document=self.document),
-                self._maps)
-            # Apply all the filters in definition order and reject as soon as one fails
-            accepted = reduce(
-                lambda accepted, filter_fn: False if not accepted else filter_fn(
-                    value=item.value,
-                    item=item,
-                    field=self,
-                    etree=self.etree,
-                    document=self.document),
-                self._filters, True)
-            if accepted:
-                value.append(item)
+        budget = self._budget
+        try:
+            for i, element in enumerate(elements):
+                if budget is not None:
+                    budget.spend_items()
+                item = self._parse_item(i, element)
+                if self._accepts(item):
+                    value.append(item)
+        except BudgetExceeded:
+            # Keep the items parsed so far as a partial result
+            self._value = value
+            self.partial = True
+            raise
         return value
 
+    def _parse_incremental(self, elements):
+        digest_fn = self.incremental if callable(self.incremental) else row_digest
+        state = _incremental_state(self)
+        previous = state.get('rows', {})
+        previous_accepted = state.get('accepted', [])
+        value = []
+        rows = {}
+        used = {}
+        accepted = []
+        budget = self._budget
+        try:
+            for i, element in enumerate(elements):
+                digest = digest_fn(element)
+                item = _reusable_row(previous, used, digest)
+                if item is None:
+                    if budget is not None:
+                        budget.spend_items()
+                    item = self._parse_item(i, element)
+                rows.setdefault(digest, []).append(item)
+                if self._accepts(item):
+                    value.append(item)
+                    accepted.append(digest)
+        except BudgetExceeded:
+            self._value = value
+            self.partial = True
+            raise
+        previous_digests = set(previous_accepted)
+        current_digests = set(accepted)
+        self.diff = Diff(
+            added=[i for i, digest in enumerate(accepted) if digest not in previous_digests],
+            removed=[i for i, digest in enumerate(previous_accepted) if digest not in current_digests],
+            changed=[])
+        for item in itertools.chain.from_iterable(rows.itervalues()):
+            item._release_tree()
+        state.update(rows=rows, accepted=accepted)
+        return value
+
+    def _parse_sharded(self, elements):
+        global _shard_state
+        size = self.shard_size or max(1, -(-len(elements) // (self.processes * 4)))
+        bounds = [(start, min(start + size, len(elements))) for start in xrange(0, len(elements), size)]
+        budget = self._budget
+        if budget is not None:
+            budget.spend_items(len(elements))
+        _shard_state = (self, elements)
+        pool = multiprocessing.Pool(self.processes)
+        try:
+            result = pool.map_async(_parse_shard, bounds)
+            while not result.ready():
+                result.wait(0.1)
+                if budget is not None:
+                    budget.check()
+            shards = result.get()
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+            _shard_state = None
+        value = []
+        for (start, end), shard in itertools.izip(bounds, shards):
+            if shard is None:
+                # Parsed again in process, keeping the items themselves
+                items = (self._parse_item(i, elements[i]) for i in xrange(start, end))
+                value.extend(item for item in items if self._accepts(item))
+            else:
+                value.extend(ParsedValue(item) for item in pickle.loads(shard))
+        return value
+
+    def _parse_item(self, i, element):
+        item = copy.deepcopy(self.item)
+        try:
+            item.parse(element, self.document)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            raise ParsingError('Failed to parse item {0} for source "{1}": {2}'.format(i, self.source, e.message)),\
+                None, sys.exc_info()[2]
+        # Apply all the maps in definition order
+        map(lambda map_fn: map_fn(
+                value=item.value,
+                item=item,
+                field=self,
+                etree=self.etree,
+                document=self.document),
+            self._maps)
+        return item
+
+    def _accepts(self, item):
+        # Apply all the filters in definition order and reject as soon as one fails
+        return reduce(
+            lambda accepted, filter_fn: False if not accepted else filter_fn(
+                value=item.value,
+                item=item,
+                field=self,
+                etree=self.etree,
+                document=self.document),
+            self._filters, True)
+
     def filter(self, fn):
         # Decorated function only need declare the arguments it's interested in:
         # value, item, field, etree, document
         # It needs to return a truthy or falsey value
         self._filters.append(fn)
+        Field._definition_version += 1
         return fn
 
     def map(self, fn):
         # Decorated function only need declare the arguments it's interested in:
         # value, item, field, etree, document
         self._maps.append(fn)
+        Field._definition_version += 1
         return fn
 
     @Field.value.getter
     def value(self):
+        if self._value is None:
+            # Not parsed yet
+            return None
         return [item.value for item in self._value]
 
 
+def _field_path(container, target):
+    """Finds a field described as ``target`` that ``container`` parses from its own element, returning its
+    path through the parsed container, or None if there is none."""
+    try:
+        if describe(container) == target:
+            return ()
+    except UndescribableError:
+        return None
+    # Only look inside structures parsed from the same element as the container
+    if isinstance(container, StructuredField) and isinstance(container.source, ElementField) and \
+            unicode(container.source) == '.' and container.structure:
+        for name, field in container.structure.iteritems():
+            path = _field_path(field, target)
+            if path is not None:
+                return ((name, None),) + path
+    return None
+
+
 class DictField(BiaxialAccessContainer, Mapping, Field):
+    """A mapping of ``item`` fields, one for each element selected by the source, keyed by ``key``.
+
+    :param item: The field to deep copy and parse for each element
+    :param key: Either a field parsed from the same element as the item, or a path through the parsed
+        item using field access, e.g. ``'name'`` or ``'details/name'``. Paths are split once, on the first
+        parse. A key field defined like the item or one of its structure's subfields, down to the values
+        their processors close over, isn't parsed again: its value is read from the parsed item instead.
+        Otherwise it is parsed on its own for each element.
+    :param duplicates: What to do with an item whose key was already seen: ``'last'`` replaces the earlier
+        item, keeping its position, ``'first'`` keeps the earlier item and ``'error'`` raises a ParsingError
+    :param incremental: As for :class:`ListField`, with :attr:`diff` holding the ``added``, ``removed``
+        and ``changed`` keys, a key being changed when its row's digest differs from the previous parse.
+    """
     default_source = ElementsField
-
-    def __init__(self, source, item=None, key=None, *args, **kwargs):
+    _runtime_attributes = Field._runtime_attributes + ('diff', 'partial', '_key_path', '_key_resolution')
+    # The resolved key path, shared by the copies parsed for each row of an enclosing list or dict
+    _shared_attributes = ('_key_resolution',)
+    duplicate_policies = ('last', 'first', 'error')
+
+    def __init__(self, source, item=None, key=None, incremental=False, duplicates='last', *args, **kwargs):
+        if duplicates not in self.duplicate_policies:
+            raise ValueError('duplicates must be one of {0}, got "{1}"'.format(
+                ', '.join(self.duplicate_policies), duplicates))
+        _reject_incremental((item, key))
         super(DictField, self).__init__(source, *args, **kwargs)
         self.item = item
         self.key = key
+        self.incremental = incremental
+        self.duplicates = duplicates
         self._filters = []
         self._maps = []
+        if self.intern:
+            self._enable_intern()
+
+    def _enable_intern(self):
+        super(DictField, self)._enable_intern()
+        for field in (self.item, self.key):
+            if isinstance(field, Field):
+                field._enable_intern()
+
+    def _reset(self):
+        super(DictField, self)._reset()
+        self.diff = None
+        self.partial = False
+        self._key_path = None
+        self._key_resolution = {}
+
+    def parse(self, etree, document):
+        # Set again when the budget runs out while parsing the items
+        self.partial = False
+        return super(DictField, self).parse(etree, document)
+
+    def _resolve_key(self):
+        """Turns the key into a path through the parsed item, done on the first parse rather than on
+        definition so processors added to the fields afterwards are taken into account. The path is kept
+        until a processor is added to any field, and shared with the copies of this field."""
+        resolution = self._key_resolution
+        if resolution.get('version') != Field._definition_version:
+            path = None
+            if isinstance(self.key, basestring):
+                path = compile_path(self.key)
+            elif isinstance(self.key, Field):
+                try:
+                    path = _field_path(self.item, describe(self.key))
+                except UndescribableError:
+                    # Parsed on its own for each element
+                    pass
+            resolution.update(version=Field._definition_version, path=path)
+        self._key_path = resolution['path']
+
+    def _store(self, value, key, item):
+        """Adds ``item`` under ``key`` according to the duplicates policy, returning whether it was added."""
+        if key in value:
+            if self.duplicates == 'first':
+                return False
+            elif self.duplicates == 'error':
+                raise ParsingError('Duplicate key "{0}" for source "{1}"'.format(key, self.source))
+        value[key] = item
+        return True
 
     def _parse(self, elements):
+        self._resolve_key()
+        if self.incremental:
+            return self._parse_incremental(elements)
         value = OrderedDict()
-        for i, element in enumerate(elements):
-            item = copy.deepcopy(self.item)
-            if isinstance(self.key, Field):
-                # Parse the key first, then the item
-                key = copy.deepcopy(self.key)
-                try:
-                    key.parse(element, self.document)
-                except Exception as e:
-                    raise ParsingError('Failed to parse key {0} for source "{1}": {2}'.format(i, self.source, e.message)),\
-                        None, sys.exc_info()[2]
-                try:
-                    item.parse(element, self.document)
-                except Exception as e:
-                    raise ParsingError('Failed to parse item "{0}" for source "{1}": {2}'.format(key.value, self.source, e.message)),\
-                        None, sys.exc_info()[2]
-            elif isinstance(self.key, basestring):
-                # Parse item first, then extract key from it via element access
-                try:
-                    item.parse(element, self.document)
-                except Exception as e:
-                    raise ParsingError('Failed to parse item {0} for source "{1}": {2}'.format(i, self.source, e.message)),\
-                        None, sys.exc_info()[2]
-                key = item
-                for index in self.key.split('/'):
-                    key = key(index)
-            # Apply all the maps in definition order
-            map(lambda map_fn: map_fn(
-                    key=key.value,
-                    value=item.value,
-                    item=item,
-                    field=self,
-                    etree=self.etree,
-                    document=self.document),
-                self._maps)
-            # Apply all the filters in definition order and reject as soon as one fails
-            accepted = reduce(
-                lambda accepted, filter_fn: False if not accepted else filter_fn(
-                    key=key.value,
-                    value=item.value,
-                    item=item,
-                    field=self,
-                    etree=self.etree,
-                    document=self.document),
-                self._filters, True)
-            if accepted:
-                value[key.value] = item
+        budget = self._budget
+        try:
+            for i, element in enumerate(elements):
+                if budget is not None:
+                    budget.spend_items()
+                key, item = self._parse_item(i, element)
+                if self._accepts(key, item):
+                    self._store(value, key, item)
+        except BudgetExceeded:
+            # Keep the items parsed so far as a partial result
+            self._value = value
+            self.partial = True
+            raise
+        return value
+
+    def _parse_incremental(self, elements):
+        digest_fn = self.incremental if callable(self.incremental) else row_digest
+        state = _incremental_state(self)
+        previous = state.get('rows', {})
+        previous_digests = state.get('digests', {})
+        value = OrderedDict()
+        rows = {}
+        used = {}
+        digests = {}
+        budget = self._budget
+        try:
+            for i, element in enumerate(elements):
+                digest = digest_fn(element)
+                row = _reusable_row(previous, used, digest)
+                if row is None:
+                    if budget is not None:
+                        budget.spend_items()
+                    row = self._parse_item(i, element)
+                rows.setdefault(digest, []).append(row)
+                key, item = row
+                if self._accepts(key, item) and self._store(value, key, item):
+                    digests[key] = digest
+        except BudgetExceeded:
+            self._value = value
+            self.partial = True
+            raise
+        self.diff = Diff(
+            added=[key for key in digests if key not in previous_digests],
+            removed=[key for key in previous_digests if key not in digests],
+            changed=[key for key, digest in digests.iteritems()
+                     if key in previous_digests and previous_digests[key] != digest])
+        for key, item in itertools.chain.from_iterable(rows.itervalues()):
+            item._release_tree()
+        state.update(rows=rows, digests=digests)
         return value
 
+    def _parse_item(self, i, element):
+        item = copy.deepcopy(self.item)
+        if self._key_path is None:
+            # The key field isn't part of the item, parse it on its own first
+            try:
+                key = self.key.parse(element, self.document)
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                raise ParsingError('Failed to parse key {0} for source "{1}": {2}'.format(i, self.source, e.message)),\
+                    None, sys.exc_info()[2]
+            finally:
+                # The key field is the definition itself, it shouldn't keep the row's tree alive
+                self.key._release_tree()
+                self.key._value = None
+                self.key.document = None
+        try:
+            item.parse(element, self.document)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            raise ParsingError('Failed to parse item {0} for source "{1}": {2}'.format(
+                '"{0}"'.format(key) if self._key_path is None else i, self.source, e.message)),\
+                None, sys.exc_info()[2]
+        if self._key_path is not None:
+            # Read the key straight from the parsed item
+            node = item
+            try:
+                for step, index in self._key_path:
+                    children = node._value
+                    node = children[index if index is not None and isinstance(children, list) else step]
+                key = node.value
+            except (KeyError, IndexError, TypeError, AttributeError) as e:
+                raise ParsingError('Failed to extract key {0} for source "{1}" from item {2}: {3!r}'.format(
+                    self.key, self.source, i, e)), None, sys.exc_info()[2]
+        # Apply all the maps in definition order
+        map(lambda map_fn: map_fn(
+                key=key,
+                value=item.value,
+                item=item,
+                field=self,
+                etree=self.etree,
+                document=self.document),
+            self._maps)
+        return key, item
+
+    def _accepts(self, key, item):
+        # Apply all the filters in definition order and reject as soon as one fails
+        return reduce(
+            lambda accepted, filter_fn: False if not accepted else filter_fn(
+                key=key,
+                value=item.value,
+                item=item,
+                field=self,
+                etree=self.etree,
+                document=self.document),
+            self._filters, True)
+
     def filter(self, fn):
         # Decorated function only need declare the arguments it's interested in:
         # key, value, item, field, etree, document
         # It needs to return a truthy or falsey value
         self._filters.append(fn)
+        Field._definition_version += 1
         return fn
 
     def map(self, fn):
         # Decorated function only need declare the arguments it's interested in:
         # key, value, item, field, etree, document
         self._maps.append(fn)
+        Field._definition_version += 1
         return fn
 
     @Field.value.getter
     def value(self):
+        if self._value is None:
+            # Not parsed yet
+            return None
         return {key: item.value for (key, item) in self._value.iteritems()}
 
 
 class StructuredListField(TriaxialAccessContainer, ListField):
     def __init__(self, source, structure=None, *args, **kwargs):
         item = StructuredField(source='.', structure=structure)
-        super(StructuredListField, self).__init__(source, item=item)
+        super(StructuredListField, self).__init__(source, item=item, *args, **kwargs)
         self._item_ = item # For consistency with the structure access axis
 
     def _get_structure_definition(self, key):
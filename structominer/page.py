@@ -0,0 +1,74 @@
+"""A page parsed once and shared by several :class:`Document` classes."""
+
+from lxml import etree
+
+from .selectors import compile_xpath
+
+
+def build_etree(html, region=None, whole_page=None):
+    """Parses ``region`` of the page if it is given and can be found, otherwise the whole page.
+    Returns the tree along with whether the region was found, None without a region.
+
+    :param whole_page: A callable returning the tree of the whole page, instead of parsing it again
+    """
+    whole_page = whole_page or (lambda: etree.HTML(html))
+    if region is None:
+        return whole_page(), None
+    fragment = region.extract(html)
+    if fragment is None:
+        return whole_page(), False
+    charset = region.charset(html) if isinstance(html, str) else None
+    parser = None
+    if charset:
+        try:
+            parser = etree.HTMLParser(encoding=charset)
+        except LookupError:
+            # Unknown encodings are left for lxml to guess, as it does for the whole page
+            pass
+    return etree.HTML(fragment, parser=parser), True
+
+
+class Page(object):
+    """Holds the raw content of a page along with its tree, built on first use, so several documents can
+    parse it without each building their own, e.g. ``Page(html).parse(Listing, Pagination, Metadata)``.
+    Pass a page wherever a document takes html.
+
+    Selections made from the root of the tree are remembered by selector, so documents selecting the same
+    containers only evaluate them once. Documents with different regions get a tree for each region.
+    Documents modifying the tree, e.g. removing elements in an :class:`ElementsOperation`, change it
+    for the documents parsing the page after them too.
+
+    :param html: HTML content to parse
+    """
+    def __init__(self, html):
+        self.html = html
+        self._etrees = {}
+        self._selections = {}
+
+    def etree(self, region=None):
+        """Returns the tree of ``region``, or of the whole page for None, along with whether the region was
+        found, building it on first use."""
+        key = repr(region) if region is not None else None
+        if key not in self._etrees:
+            # Documents without a region and those whose region can't be found share the whole page's tree
+            whole_page = (lambda: self.etree()[0]) if region is not None else None
+            self._etrees[key] = build_etree(self.html, region, whole_page)
+        return self._etrees[key]
+
+    def select(self, selector, context):
+        """Evaluates the XPath ``selector`` from ``context``, reusing the result of an earlier evaluation
+        when ``context`` is the root of one of the page's trees."""
+        if not any(context is tree for (tree, found) in self._etrees.itervalues()):
+            return compile_xpath(selector)(context)
+        key = (id(context), selector)
+        try:
+            elements = self._selections[key]
+        except KeyError:
+            elements = self._selections[key] = compile_xpath(selector)(context)
+        # Callers get their own list, the remembered one is shared
+        return list(elements) if isinstance(elements, list) else elements
+
+    def parse(self, *document_classes, **kwargs):
+        """Parses the page with each of ``document_classes`` in order, returning the documents.
+        Keyword arguments are passed to each document, e.g. ``intern_pool``."""
+        return [document_class(self, **kwargs) for document_class in document_classes]
@@ -0,0 +1,107 @@
+"""Locating the part of the raw page a :class:`Document` reads, so only that part is parsed into a tree."""
+
+import re
+
+
+_charset_re = re.compile(r'<meta[^>]+charset\s*=\s*["\']?([\w-]+)', re.IGNORECASE)
+_opaque_re = re.compile(r'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+
+
+def _outside_opaque(matches, html):
+    """Filters out the matches that fall inside scripts, styles or comments."""
+    spans = _opaque_re.finditer(html)
+    span = next(spans, None)
+    for match in matches:
+        while span is not None and span.end() <= match.start():
+            span = next(spans, None)
+        if span is None or match.start() < span.start():
+            yield match
+
+
+class Region(object):
+    """Declares the slice of the page that holds everything a document selects, found in the raw markup
+    without building a tree. Give one of:
+
+    :param id: The id of the container element, the slice runs from its start tag to its matching end tag
+    :param cls: A class of the container element, the first element having it is used
+    :param start: A literal marker where the slice starts, e.g. ``'<table id="items"'``
+    :param end: A literal marker after ``start`` where the slice ends (included),
+        the slice runs to the end of the page if it is missing
+
+    The slice is parsed on its own, so field selectors must not rely on anything outside of it,
+    e.g. ``//table[@id="items"]//tr`` rather than ``//body/center/table[1]//tr``. The matching end tag
+    is found by counting the container's tag name, ignoring scripts, styles and comments.
+    When the anchor can't be found the whole page is parsed instead.
+    """
+    def __init__(self, id=None, cls=None, start=None, end=None):
+        if len([anchor for anchor in (id, cls, start) if anchor is not None]) != 1:
+            raise ValueError('Region expects exactly one of id, cls or start')
+        self.id = id
+        self.cls = cls
+        self.start = start
+        self.end = end
+        if id is not None:
+            self._anchor_re = re.compile(
+                r'<([a-zA-Z][\w:-]*)\b[^>]*?\sid\s*=\s*(["\']?){0}\2[\s/>]'.format(re.escape(id)))
+        elif cls is not None:
+            self._anchor_re = re.compile(
+                r'<([a-zA-Z][\w:-]*)\b[^>]*?\sclass\s*=\s*(["\'])(?:[^"\']*\s)?{0}(?:\s[^"\']*)?\2'.format(
+                    re.escape(cls)))
+        else:
+            self._anchor_re = None
+
+    def __repr__(self):
+        return 'Region(id={0!r}, cls={1!r}, start={2!r}, end={3!r})'.format(self.id, self.cls, self.start, self.end)
+
+    def __getstate__(self):
+        return dict(id=self.id, cls=self.cls, start=self.start, end=self.end)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def extract(self, html):
+        """Returns the slice of ``html`` covered by the region, or None if its anchor isn't in the page."""
+        if self._anchor_re is None:
+            start = self._marker(self.start, html)
+            end = self._marker(self.end, html) if self.end is not None else None
+            if start is None:
+                return None
+            begin = html.find(start)
+            if begin < 0:
+                return None
+            finish = html.find(end, begin + len(start)) if end is not None else -1
+            return html[begin:finish + len(end)] if finish >= 0 else html[begin:]
+        match = next(_outside_opaque(self._anchor_re.finditer(html), html), None)
+        if match is None:
+            return None
+        return html[match.start():self._find_end(html, match.group(1), match.end())]
+
+    def _marker(self, marker, html):
+        """Converts ``marker`` to the string type of ``html``, using the page's charset for byte strings,
+        or returns None if it can't be represented."""
+        try:
+            if isinstance(html, unicode) and isinstance(marker, str):
+                return marker.decode('utf-8')
+            elif isinstance(html, str) and isinstance(marker, unicode):
+                return marker.encode(self.charset(html) or 'utf-8')
+        except (UnicodeError, LookupError):
+            return None
+        return marker
+
+    def _find_end(self, html, tag, position):
+        """Finds the end of the element whose start tag ends before ``position``."""
+        depth = 1
+        tags = re.compile(r'<(/?){0}\b[^>]*?(/?)>'.format(re.escape(tag)), re.IGNORECASE)
+        for match in _outside_opaque(tags.finditer(html, position), html):
+            if match.group(1):
+                depth -= 1
+                if not depth:
+                    return match.end()
+            elif not match.group(2):
+                depth += 1
+        return len(html)
+
+    def charset(self, html):
+        """The charset declared in the page, which the slice would otherwise lose."""
+        match = _charset_re.search(html[:4096])
+        return match.group(1) if match is not None else None
@@ -0,0 +1,160 @@
+"""Picklable representation of :class:`Document` definitions for shipping to worker processes."""
+
+from collections import OrderedDict
+import cPickle as pickle
+import hashlib
+import importlib
+import sys
+import types
+
+from .document import Document
+from .fields import Field
+
+
+def _function_names(document_class):
+    """Maps the functions defined in the bodies of ``document_class`` and its bases to qualified names."""
+    names = {}
+    for cls in reversed(document_class.__mro__):
+        for name, attr in vars(cls).iteritems():
+            if isinstance(attr, (staticmethod, classmethod)):
+                attr = attr.__func__
+            if isinstance(attr, types.FunctionType):
+                names[attr] = '{0}:{1}.{2}'.format(cls.__module__, cls.__name__, name)
+    return names
+
+
+def _reference(obj, names):
+    if obj in names:
+        return names[obj]
+    module = sys.modules.get(obj.__module__)
+    if getattr(module, obj.__name__, None) is obj:
+        return '{0}:{1}'.format(obj.__module__, obj.__name__)
+    raise ValueError('Cannot reference {0!r} by name, define it at module level or in the document body'.format(obj))
+
+
+def resolve(reference):
+    """Imports the object referenced by a qualified name such as ``module:Class.attribute``."""
+    module_name, _, path = reference.partition(':')
+    obj = importlib.import_module(module_name)
+    for name in path.split('.'):
+        obj = getattr(obj, name)
+    return getattr(obj, 'im_func', obj)
+
+
+# Document classes rebuilt in this process, by schema key
+_document_classes = {}
+
+# Class attributes of documents carried by schemas along with the fields
+OPTIONS = ('cache', 'budget', 'allow_partial')
+
+
+def _dump(obj, names, memo):
+    """Describes ``obj`` with plain picklable structures, fields shared within the tree are dumped once."""
+    if isinstance(obj, Field):
+        if id(obj) in memo:
+            return ('same', memo[id(obj)])
+        memo[id(obj)] = len(memo)
+        state = [(name, _dump(attr, names, memo)) for (name, attr) in vars(obj).iteritems()
+                 if name not in obj._runtime_attributes]
+        return ('field', _reference(obj.__class__, names), state)
+    elif isinstance(obj, OrderedDict):
+        return ('odict', [(key, _dump(value, names, memo)) for (key, value) in obj.iteritems()])
+    elif isinstance(obj, dict):
+        return ('dict', [(key, _dump(value, names, memo)) for (key, value) in obj.iteritems()])
+    elif isinstance(obj, list):
+        return ('list', [_dump(item, names, memo) for item in obj])
+    elif isinstance(obj, tuple):
+        return ('tuple', [_dump(item, names, memo) for item in obj])
+    elif isinstance(obj, (types.FunctionType, type, types.ClassType)):
+        return ('ref', _reference(obj, names))
+    return ('value', obj)
+
+
+def _load(data, memo):
+    kind, content = data[0], data[-1]
+    if kind == 'field':
+        cls = resolve(data[1])
+        field = cls.__new__(cls)
+        memo.append(field)
+        for name, attr in content:
+            setattr(field, name, _load(attr, memo))
+        field._reset()
+        return field
+    elif kind == 'same':
+        return memo[content]
+    elif kind == 'odict':
+        return OrderedDict((key, _load(value, memo)) for (key, value) in content)
+    elif kind == 'dict':
+        return dict((key, _load(value, memo)) for (key, value) in content)
+    elif kind == 'list':
+        return [_load(item, memo) for item in content]
+    elif kind == 'tuple':
+        return tuple(_load(item, memo) for item in content)
+    elif kind == 'ref':
+        return resolve(content)
+    return content
+
+
+class Schema(object):
+    """A compact, picklable description of a :class:`Document` class: its field tree with selectors
+    and options, and its processors, filters and maps referenced by qualified name.
+
+    Processors defined in the document's body are referenced through the class, e.g.
+    ``examples.hn:HNHome._clean_item_domain``, so the module defining them must be importable
+    wherever the schema is loaded. Lambdas and nested functions can't be referenced.
+
+    Besides the fields, the document's :attr:`~Document.region`, :attr:`~Document.cache`,
+    :attr:`~Document.budget` and :attr:`~Document.allow_partial` are carried over. Anything else defined
+    on the class or its bases, such as methods or overridden behaviour, is lost: the rebuilt class
+    derives from :class:`Document` directly. A budget with a cancellation token can't be shipped.
+
+    Workers call :meth:`document_class` (or :meth:`parse`) which rebuilds the fields once per process,
+    shared by all the copies of schemas with the same content, so shipping the schema with every task
+    doesn't rebuild them each time.
+    """
+    def __init__(self, document_class):
+        names = _function_names(document_class)
+        memo = {}
+        self.name = document_class.__name__
+        self.module = document_class.__module__
+        self.region = document_class.region
+        self.options = dict((name, getattr(document_class, name)) for name in OPTIONS)
+        self.fields = [(name, _dump(field, names, memo))
+                       for (name, field) in document_class()._fields.iteritems()]
+        self.key = self._content_key()
+        self._document_class = None
+
+    def _content_key(self):
+        state = self.__getstate__()
+        del state['key']
+        try:
+            data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError):
+            # Such a schema can't be shipped anyway, keep its class to itself
+            return None
+        return hashlib.sha1(data).hexdigest()
+
+    def __getstate__(self):
+        return dict(name=self.name, module=self.module, region=self.region, options=self.options,
+                    fields=self.fields, key=getattr(self, 'key', None))
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._document_class = None
+
+    def document_class(self):
+        """Returns a :class:`Document` subclass with the described fields, built on first use in this process."""
+        if self._document_class is None and self.key is not None:
+            self._document_class = _document_classes.get(self.key)
+        if self._document_class is None:
+            memo = []
+            attributes = dict((name, _load(field, memo)) for (name, field) in self.fields)
+            attributes.update(self.options)
+            attributes.update(__module__=self.module, region=self.region, _schema=self)
+            self._document_class = type(self.name, (Document,), attributes)
+            if self.key is not None:
+                _document_classes[self.key] = self._document_class
+        return self._document_class
+
+    def parse(self, html):
+        return self.document_class()(html)
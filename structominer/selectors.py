@@ -0,0 +1,35 @@
+"""Process-wide caches of compiled XPath expressions and of CSS selectors translated to XPath,
+shared by all fields of all documents."""
+
+from lxml import etree
+
+try:
+    from cssselect import HTMLTranslator
+except ImportError:
+    HTMLTranslator = None
+
+
+_xpath_cache = {}
+_css_cache = {}
+_translator = HTMLTranslator() if HTMLTranslator is not None else None
+
+
+def compile_xpath(xpath):
+    """Returns the compiled :class:`etree.XPath` for ``xpath``, compiling it on first use."""
+    try:
+        return _xpath_cache[xpath]
+    except KeyError:
+        compiled = _xpath_cache[xpath] = etree.XPath(xpath, smart_strings=False)
+        return compiled
+
+
+def css_to_xpath(css):
+    """Translates a CSS selector to XPath on first use, requires ``cssselect``.
+    Like :class:`lxml.cssselect.CSSSelector`, the result matches the context element and its descendants."""
+    try:
+        return _css_cache[css]
+    except KeyError:
+        if _translator is None:
+            raise ImportError('CSS selectors require the cssselect package')
+        xpath = _css_cache[css] = _translator.css_to_xpath(css)
+        return xpath
@@ -0,0 +1,121 @@
+"""Serialization of parsed documents straight from the field tree, written to a file-like object as it goes."""
+
+import datetime
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .fields import BiaxialAccessContainer
+
+
+def json_default(obj):
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError('{0!r} is not JSON serializable'.format(obj))
+
+
+_encode_json = json.JSONEncoder(separators=(',', ':'), default=json_default).encode
+
+
+def _key(key):
+    if isinstance(key, basestring):
+        return key
+    elif isinstance(key, (datetime.date, datetime.datetime)):
+        return key.isoformat()
+    return unicode(key)
+
+
+def _write_json(node, write):
+    items = node._value if isinstance(node, BiaxialAccessContainer) else None
+    if isinstance(items, list):
+        write('[')
+        for i, item in enumerate(items):
+            if i:
+                write(',')
+            _write_json(item, write)
+        write(']')
+    elif isinstance(items, dict):
+        write('{')
+        for i, (key, item) in enumerate(items.iteritems()):
+            if i:
+                write(',')
+            write(_encode_json(_key(key)))
+            write(':')
+            _write_json(item, write)
+        write('}')
+    else:
+        # Leaf fields, unparsed containers and values loaded from elsewhere
+        write(_encode_json(node.value))
+
+
+def _parsed_fields(document):
+    """The fields of ``document`` holding parsed values, as in its cached and pickled values."""
+    return [(name, document._value[name]) for (name, field) in document._fields.iteritems() if field.auto_parse]
+
+
+def _write_document_json(document, write):
+    write('{')
+    for i, (name, field) in enumerate(_parsed_fields(document)):
+        if i:
+            write(',')
+        write(_encode_json(name))
+        write(':')
+        _write_json(field, write)
+    write('}')
+
+
+def dump_json(document, fp):
+    """Writes the values of a parsed :class:`Document` to ``fp`` as a JSON object, one field at a time,
+    without building the nested values first. Dates and datetimes are written in ISO 8601 format.
+    Fields with ``auto_parse=False`` are left out. A value that can't be serialized raises, leaving
+    what was written before it."""
+    _write_document_json(document, fp.write)
+
+
+def dump_ndjson(documents, fp):
+    """Writes each of the parsed ``documents`` to ``fp`` as one line of JSON. Each line is written once it
+    is complete, so a document that can't be serialized raises, leaving the lines of the documents before it."""
+    for document in documents:
+        chunks = []
+        _write_document_json(document, chunks.append)
+        chunks.append('\n')
+        fp.write(''.join(chunks))
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError('{0!r} is not msgpack serializable'.format(obj))
+
+
+def _write_msgpack(node, packer, write):
+    items = node._value if isinstance(node, BiaxialAccessContainer) else None
+    if isinstance(items, list):
+        write(packer.pack_array_header(len(items)))
+        for item in items:
+            _write_msgpack(item, packer, write)
+    elif isinstance(items, dict):
+        write(packer.pack_map_header(len(items)))
+        for key, item in items.iteritems():
+            write(packer.pack(_key(key)))
+            _write_msgpack(item, packer, write)
+    else:
+        write(packer.pack(node.value))
+
+
+def dump_msgpack(document, fp):
+    """Writes the values of a parsed :class:`Document` to ``fp`` as a msgpack map, requires ``msgpack``.
+    As with :func:`dump_json`, fields with ``auto_parse=False`` are left out and the map is written as it
+    goes."""
+    if msgpack is None:
+        raise ImportError('dump_msgpack requires the msgpack package')
+    packer = msgpack.Packer(default=_msgpack_default)
+    write = fp.write
+    fields = _parsed_fields(document)
+    write(packer.pack_map_header(len(fields)))
+    for name, field in fields:
+        write(packer.pack(name))
+        _write_msgpack(field, packer, write)
@@ -1,6 +1,23 @@
+import cPickle as pickle
+from cStringIO import StringIO
+import json
 import re
 import unicodedata
 
+from lxml import etree
+
+# The fastest JSON parser available for whole documents, raw_decode needs the standard library's
+try:
+    import ujson as fast_json
+except ImportError:
+    try:
+        import simplejson as fast_json
+    except ImportError:
+        fast_json = json
+
+_json_decoder = json.JSONDecoder()
+_whitespace_re = re.compile(r'\s*')
+
 
 def clean_ascii(utf8_text):
     if not isinstance(utf8_text, basestring):
@@ -44,13 +61,73 @@ def clean_ascii(utf8_text):
     return ascii_text.strip()
 
 
-def clean_strings(strings, filter_empty=True):
-    clean = map(clean_ascii, strings)
+def clean_strings(strings, filter_empty=True, clean_fn=clean_ascii):
+    clean = map(clean_fn, strings) if clean_fn is not None else list(strings)
     if filter_empty:
         clean = filter(lambda s: len(s) > 0 if isinstance(s, basestring) or isinstance(s, list) else True, clean)
     return clean
 
 
+class InternPool(object):
+    """Keeps a single object for each distinct string value, and remembers the cleaned version of each
+    raw text so that :func:`clean_ascii` runs once per distinct text. Shared by a document's fields
+    that have ``intern=True``, or by several documents when passed to each of them."""
+    def __init__(self):
+        self._values = {}
+        self._cleaned = {}
+
+    def intern(self, value):
+        if not isinstance(value, basestring):
+            return value
+        return self._values.setdefault(value, value)
+
+    def clean(self, text):
+        """Memoized :func:`clean_ascii`, returning interned values."""
+        try:
+            return self._cleaned[text]
+        except KeyError:
+            value = self._cleaned[text] = self.intern(clean_ascii(text))
+            return value
+        except TypeError:
+            # Unhashable values aren't text, clean_ascii leaves them as they are
+            return text
+
+    def __len__(self):
+        return len(self._values)
+
+
+def json_loads(text):
+    return fast_json.loads(text)
+
+
+def json_decode_at(text, position):
+    """Decodes the JSON value starting at ``position`` in ``text``, ignoring anything after it."""
+    position = _whitespace_re.match(text, position).end()
+    return _json_decoder.raw_decode(text, position)[0]
+
+
+def compile_path(path):
+    """Splits a path such as ``'items/0/name'`` into (key, index) steps, index being the step as an int
+    when it is numeric, to be used when the step is applied to a list."""
+    return tuple((step, int(step) if step.isdigit() else None) for step in path.split('/'))
+
+
 def element_to_string(element):
     attributes = ['{0}="{1}"'.format(*attr) for attr in element.attrib.iteritems()]
     return '<{0}>'.format(' '.join([element.tag] + attributes))
+
+
+def _refuse_elements(obj):
+    if isinstance(obj, etree._Element):
+        raise pickle.PicklingError('Cannot pickle {0!r}, lxml elements only exist within their tree'.format(obj))
+    return None
+
+
+def dumps(obj):
+    """Pickles ``obj`` with the highest protocol, raising a PicklingError for lxml elements, including
+    the parents of smart strings, which would otherwise pickle as invalid element proxies."""
+    output = StringIO()
+    pickler = pickle.Pickler(output, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = _refuse_elements
+    pickler.dump(obj)
+    return output.getvalue()
@@ -0,0 +1,88 @@
+import threading
+
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import (Document, TextField, IntField, ListField, StructuredListField, ResultCache,
+                          Budget, BudgetExceeded, CancellationToken, ParsingCancelled)
+
+
+html = '<h1>Title</h1><ul>{0}</ul><p>Footer</p>'.format(''.join('<li>{0}</li>'.format(i) for i in range(10)))
+
+
+def make_doc():
+    class Doc(Document):
+        title = TextField('//h1')
+        numbers = ListField('//li', item=IntField('.'))
+        footer = TextField('//p')
+    return Doc
+
+
+class BudgetTests(TestCase):
+
+    @istest
+    def exceeding_the_item_budget_should_raise(self):
+        self.assertRaises(BudgetExceeded, make_doc(), html, budget=Budget(items=5))
+
+    @istest
+    def exceeding_the_budget_should_not_be_swallowed_by_error_handlers(self):
+        class Doc(Document):
+            numbers = StructuredListField('//li', structure=dict(number=IntField('.')))
+
+            @numbers.error_handler
+            def _ignore_errors(**kwargs):
+                return []
+
+        self.assertRaises(BudgetExceeded, Doc, html, budget=Budget(elements=5))
+
+    @istest
+    def partial_parsing_should_keep_the_items_parsed_so_far(self):
+        Doc = make_doc()
+        Doc(html)
+        doc = Doc(html, budget=Budget(items=5), allow_partial=True)
+
+        self.assertTrue(doc.incomplete)
+        self.assertTrue(isinstance(doc.budget_error, BudgetExceeded))
+        self.assertEquals(doc['title'], 'Title')
+        self.assertEquals(doc['numbers'], [0, 1, 2, 3, 4])
+        self.assertEquals(doc['footer'], None)
+
+    @istest
+    def running_out_before_the_items_should_not_keep_the_previous_items(self):
+        Doc = make_doc()
+        Doc('<h1>Old</h1><ul><li>7</li><li>8</li><li>9</li></ul>')
+        doc = Doc(html, budget=Budget(elements=10), allow_partial=True)
+
+        self.assertTrue(doc.incomplete)
+        self.assertEquals(doc['title'], 'Title')
+        self.assertEquals(doc['numbers'], None)
+
+    @istest
+    def cache_hits_after_a_partial_parse_should_be_complete(self):
+        Doc = make_doc()
+        cache = ResultCache()
+        Doc(html, cache=cache)
+        doc = Doc(cache=cache, budget=Budget(items=5), allow_partial=True)
+        doc.parse(html.replace('Footer', 'Other footer'))
+        self.assertTrue(doc.incomplete)
+
+        doc.parse(html)
+        self.assertTrue(doc.cached)
+        self.assertFalse(doc.incomplete)
+        self.assertEquals(doc.budget_error, None)
+        self.assertEquals(doc['numbers'], range(10))
+
+    @istest
+    def cancelling_the_token_should_stop_parsing(self):
+        token = CancellationToken()
+        Doc = make_doc()
+
+        @Doc.numbers.item.postprocessor
+        def _cancel_from_another_thread(value, **kwargs):
+            if value == 3:
+                thread = threading.Thread(target=token.cancel)
+                thread.start()
+                thread.join()
+            return value
+
+        self.assertRaises(ParsingCancelled, Doc, html, budget=Budget(token=token))
@@ -0,0 +1,190 @@
+import functools
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import (Document, TextField, IntField, ElementField, StructuredListField, ResultCache, MemoryStore,
+                          SQLiteStore)
+from structominer.cache import fingerprint, _fingerprints
+from structominer.fields import describe
+
+
+html = '<ul><li><b>one</b> <i>1</i></li><li><b>two</b> <i>2</i></li></ul>'
+
+
+def _set_in_child(store, connections):
+    store.set('b', 'y')
+    connections.put(id(store._connection))
+
+
+class ResultCacheTests(TestCase):
+
+    @istest
+    def parsing_the_same_content_twice_should_hit_the_cache(self):
+        class Doc(Document):
+            first = TextField('//li[1]/b')
+            items = StructuredListField('//li', structure=dict(name=TextField('./b'), number=IntField('./i')))
+
+        cache = ResultCache()
+        doc1 = Doc(html, cache=cache)
+        with patch('structominer.page.etree.HTML') as mocked_html:
+            doc2 = Doc(html, cache=cache)
+            self.assertFalse(mocked_html.called)
+
+        self.assertFalse(doc1.cached)
+        self.assertTrue(doc2.cached)
+        self.assertEquals(cache.stats['hits'], 1)
+        self.assertEquals(cache.stats['misses'], 1)
+        self.assertEquals(doc2['first'], 'one')
+        self.assertEquals(doc2['items'], [{'name': 'one', 'number': 1}, {'name': 'two', 'number': 2}])
+        self.assertEquals(doc2('items')(1)['number'], 2)
+
+    @istest
+    def changing_a_processor_should_change_the_fingerprint(self):
+        def make_doc(suffix):
+            class Doc(Document):
+                first = TextField('//li[1]/b')
+
+                @first.postprocessor
+                def _suffix(value, **kwargs):
+                    return value + suffix
+            return Doc
+
+        def make_other_doc():
+            class Doc(Document):
+                first = TextField('//li[1]/b')
+
+                @first.postprocessor
+                def _suffix(value, **kwargs):
+                    return value.upper()
+            return Doc
+
+        self.assertEquals(fingerprint(make_doc('!')), fingerprint(make_doc('!')))
+        self.assertNotEquals(fingerprint(make_doc('!')), fingerprint(make_other_doc()))
+        self.assertNotEquals(fingerprint(make_doc('!')), fingerprint(make_doc('?')))
+
+    @istest
+    def fingerprints_should_be_memoized_until_processors_are_added(self):
+        class Doc(Document):
+            first = TextField('//li[1]/b')
+
+        with patch('structominer.cache.describe', side_effect=describe) as mocked_describe:
+            digest = fingerprint(Doc)
+            self.assertEquals(fingerprint(Doc), digest)
+            self.assertEquals(mocked_describe.call_count, 1)
+
+        @Doc.first.postprocessor
+        def _upper(value, **kwargs):
+            return value.upper()
+
+        self.assertNotEquals(fingerprint(Doc), digest)
+
+    @istest
+    def upgrading_structominer_should_change_the_fingerprint(self):
+        class Doc(Document):
+            first = TextField('//li[1]/b')
+
+        digest = fingerprint(Doc)
+        with patch('structominer.cache.__version__', '999.0'):
+            del _fingerprints[Doc]
+            self.assertNotEquals(fingerprint(Doc), digest)
+
+    @istest
+    def partial_processors_should_be_described_without_addresses(self):
+        def suffix(value, suffix, **kwargs):
+            return value + suffix
+
+        def make_doc(value):
+            class Doc(Document):
+                first = TextField('//li[1]/b')
+                first.postprocessor(functools.partial(suffix, suffix=value))
+            return Doc
+
+        self.assertNotIn(' at 0x', repr(describe(make_doc('!').first)))
+        self.assertEquals(fingerprint(make_doc('!')), fingerprint(make_doc('!')))
+        self.assertNotEquals(fingerprint(make_doc('!')), fingerprint(make_doc('?')))
+
+    @istest
+    def documents_using_values_described_by_address_should_not_be_cached(self):
+        marker = object()
+
+        class Doc(Document):
+            first = TextField('//li[1]/b')
+
+            @first.postprocessor
+            def _mark(value, **kwargs):
+                return value if marker else None
+
+        cache = ResultCache()
+        Doc(html, cache=cache)
+        doc = Doc(html, cache=cache)
+
+        self.assertEquals(fingerprint(Doc), None)
+        self.assertFalse(doc.cached)
+        self.assertEquals(doc['first'], 'one')
+        self.assertEquals(cache.stats, dict(hits=0, misses=0, uncacheable=2, size=0))
+
+    @istest
+    def documents_holding_elements_should_not_be_cached(self):
+        class Doc(Document):
+            first = TextField('//li[1]/b')
+            element = ElementField('//li[2]/b')
+
+        cache = ResultCache()
+        Doc(html, cache=cache)
+        doc = Doc(html, cache=cache)
+
+        self.assertFalse(doc.cached)
+        self.assertEquals(doc['element'].text, 'two')
+        self.assertEquals(cache.stats, dict(hits=0, misses=2, uncacheable=2, size=0))
+
+    @istest
+    def memory_store_should_evict_least_recently_used_entries(self):
+        store = MemoryStore(max_entries=2)
+        store.set('a', 1)
+        store.set('b', 2)
+        store.get('a')
+        store.set('c', 3)
+
+        self.assertEquals(len(store), 2)
+        self.assertEquals(store.get('a'), 1)
+        self.assertEquals(store.get('b'), None)
+
+    @istest
+    def sqlite_store_should_persist_and_evict_entries(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'cache.db')
+            store = SQLiteStore(path, max_entries=2)
+            store.set('a', 'x')
+            store.set('b', 'y')
+            store.set('c', 'z')
+
+            reopened = SQLiteStore(path, max_entries=2)
+            self.assertEquals(len(reopened), 2)
+            self.assertEquals(reopened.get('a'), None)
+            self.assertEquals(reopened.get('c'), 'z')
+        finally:
+            shutil.rmtree(directory)
+
+    @istest
+    def sqlite_store_should_reconnect_in_forked_processes(self):
+        directory = tempfile.mkdtemp()
+        try:
+            store = SQLiteStore(os.path.join(directory, 'cache.db'))
+            store.set('a', 'x')
+            connections = multiprocessing.Queue()
+            process = multiprocessing.Process(target=_set_in_child, args=(store, connections))
+            process.start()
+            child_connection = connections.get()
+            process.join()
+
+            self.assertNotEquals(child_connection, id(store._connection))
+            self.assertEquals(store.get('b'), 'y')
+        finally:
+            shutil.rmtree(directory)
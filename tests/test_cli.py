@@ -0,0 +1,70 @@
+import json
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, IntField
+from structominer.cli import main, find_pages
+
+
+class Page(Document):
+    title = TextField('//h1')
+    count = IntField('//span', optional=False)
+
+
+class CommandLineTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        pages = {'a.html': '<h1>A</h1><span>1</span>', 'b.html': '<h1>B</h1><span>2</span>',
+                 'c.html': '<h1>C</h1><span>none</span>', 'notes.txt': 'ignored'}
+        for name, html in pages.iteritems():
+            with open(os.path.join(self.directory, name), 'w') as f:
+                f.write(html)
+        self.output = os.path.join(self.directory, 'out.ndjson')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *args):
+        with patch('sys.stderr', StringIO()) as stderr:
+            status = main(['tests.test_cli:Page', self.directory, '-o', self.output] + list(args))
+        with open(self.output) as f:
+            return status, [json.loads(line) for line in f], stderr.getvalue()
+
+    @istest
+    def directories_should_be_expanded_to_sorted_pages(self):
+        pages = list(find_pages([self.directory]))
+        self.assertEquals([os.path.basename(page) for page in pages], ['a.html', 'b.html', 'c.html'])
+
+    @istest
+    def each_page_should_be_written_as_one_json_line(self):
+        status, records, stats = self.run_main()
+
+        self.assertEquals(status, 1)
+        self.assertEquals(records[0]['values'], {'title': 'A', 'count': 1})
+        self.assertEquals(records[1]['values'], {'title': 'B', 'count': 2})
+        self.assertTrue(records[2]['error'].startswith('ParsingError'))
+        self.assertTrue('3 pages' in stats and '1 errors' in stats)
+
+    @istest
+    def parallel_workers_should_keep_page_order(self):
+        status, records, stats = self.run_main('-j', '2')
+
+        self.assertEquals([os.path.basename(record['source']) for record in records], ['a.html', 'b.html', 'c.html'])
+        self.assertEquals(records[1]['values'], {'title': 'B', 'count': 2})
+
+    @istest
+    def unknown_document_classes_should_fail_before_starting_workers(self):
+        with patch('sys.stderr', StringIO()) as stderr, patch('multiprocessing.Pool') as mocked_pool:
+            with self.assertRaises(SystemExit) as raised:
+                main(['tests.test_cli:Missing', self.directory, '-j', '2'])
+
+        self.assertEquals(raised.exception.code, 2)
+        self.assertFalse(mocked_pool.called)
+        self.assertTrue('tests.test_cli:Missing' in stderr.getvalue())
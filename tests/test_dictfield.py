@@ -0,0 +1,145 @@
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import (Document, TextField, IntField, DictField, ListField, StructuredField,
+                          StructuredDictField, StructuredListField, ParsingError)
+from structominer.fields import describe
+
+
+html = '''<ul>
+<li><b>a</b> <i>1</i></li>
+<li><b>b</b> <i>2</i></li>
+<li><b>a</b> <i>3</i></li>
+</ul>'''
+
+
+class DictFieldKeyTests(TestCase):
+
+    @istest
+    def key_paths_should_reach_into_nested_items(self):
+        class Doc(Document):
+            things = DictField('//li', key='details/name', item=StructuredField('.', structure=dict(
+                details=StructuredField('.', structure=dict(name=TextField('./b'))),
+                number=IntField('./i'))))
+
+        self.assertEquals(Doc(html)['things'].keys(), ['a', 'b'])
+
+    @istest
+    def key_paths_should_index_lists(self):
+        class Doc(Document):
+            things = DictField('//li', key='0', item=ListField('./*', item=TextField('.')))
+
+        self.assertEquals(Doc(html)['things']['b'], ['b', '2'])
+
+    @istest
+    def missing_key_paths_should_raise(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', structure=dict(number=IntField('./i')), key='name')
+
+        with self.assertRaises(ParsingError):
+            Doc(html)
+
+    @istest
+    def key_fields_defined_in_the_item_should_be_parsed_once(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', key=TextField('./b'), structure=dict(
+                name=TextField('./b'), number=IntField('./i')))
+
+        with patch.object(TextField, 'parse', autospec=True, side_effect=TextField.parse) as mocked_parse:
+            doc = Doc(html)
+            names = [call for call in mocked_parse.call_args_list if unicode(call[0][0]) == './b']
+            self.assertEquals(len(names), 3)
+
+        self.assertEquals(doc['things']['b'], dict(name='b', number=2))
+
+    @istest
+    def key_fields_of_nested_dicts_should_be_resolved_once(self):
+        class Doc(Document):
+            lists = StructuredListField('//ul', structure=dict(
+                things=StructuredDictField('./li', key=TextField('./b'), structure=dict(
+                    name=TextField('./b'), number=IntField('./i')))))
+
+        Doc(html * 3)
+        with patch('structominer.fields.describe', side_effect=describe) as mocked_describe:
+            doc = Doc(html * 3)
+            self.assertEquals(mocked_describe.call_count, 0)
+
+        self.assertEquals(doc['lists'][2]['things']['b'], dict(name='b', number=2))
+
+    @istest
+    def key_fields_parsed_on_their_own_should_not_keep_the_tree(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', key=TextField('./b'), structure=dict(number=IntField('./i')))
+
+        doc = Doc(html)
+        key = Doc.things.key
+        self.assertEquals(doc['things'].keys(), ['a', 'b'])
+        self.assertIsNone(key.etree)
+        self.assertIsNone(key.document)
+        self.assertIsNone(key.source.etree)
+
+    @istest
+    def other_key_fields_should_be_parsed_on_their_own(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', key=TextField('./b'), structure=dict(number=IntField('./i')))
+
+            @things.key.postprocessor
+            def _upper(value, **kwargs):
+                return value.upper()
+
+        self.assertEquals(Doc(html)['things'], dict(A=dict(number=3), B=dict(number=2)))
+
+    @istest
+    def key_fields_differing_in_closed_over_values_should_not_be_shared(self):
+        def suffixer(suffix):
+            def _suffix(value, **kwargs):
+                return value + suffix
+            return _suffix
+
+        key = TextField('./b')
+        key.postprocessor(suffixer('-key'))
+        name = TextField('./b')
+        name.postprocessor(suffixer('-item'))
+
+        class Doc(Document):
+            things = StructuredDictField('//li', key=key, structure=dict(name=name))
+
+        self.assertEquals(Doc(html)['things']['b-key'], dict(name='b-item'))
+
+
+class DictFieldDuplicatesTests(TestCase):
+
+    @istest
+    def last_duplicate_should_win_by_default(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', structure=dict(name=TextField('./b'), number=IntField('./i')),
+                                         key='name')
+
+        doc = Doc(html)
+        self.assertEquals(doc['things'].keys(), ['a', 'b'])
+        self.assertEquals(doc['things']['a']['number'], 3)
+
+    @istest
+    def first_duplicate_should_win_when_asked(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', structure=dict(name=TextField('./b'), number=IntField('./i')),
+                                         key='name', duplicates='first', incremental=True)
+
+        doc = Doc(html)
+        self.assertEquals(doc['things']['a']['number'], 1)
+        self.assertEquals(sorted(doc('things').diff.added), ['a', 'b'])
+
+    @istest
+    def duplicates_should_raise_when_asked(self):
+        class Doc(Document):
+            things = StructuredDictField('//li', structure=dict(name=TextField('./b'), number=IntField('./i')),
+                                         key='name', duplicates='error')
+
+        with self.assertRaises(ParsingError):
+            Doc(html)
+
+    @istest
+    def unknown_duplicates_policies_should_be_rejected(self):
+        with self.assertRaises(ValueError):
+            DictField('//li', key='name', duplicates='merge')
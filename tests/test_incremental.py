@@ -0,0 +1,110 @@
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, IntField, ListField, StructuredDictField
+
+
+def page(*rows):
+    return '<ul>{0}</ul>'.format(''.join('<li><b>{0}</b> <i>{1}</i></li>'.format(*row) for row in rows))
+
+
+class IncrementalListTests(TestCase):
+
+    @istest
+    def reparsing_should_only_parse_new_rows(self):
+        class Doc(Document):
+            numbers = ListField('//li', item=IntField('./i'), incremental=True)
+
+        doc = Doc(page(('a', 1), ('b', 2)))
+        self.assertEquals(doc('numbers').diff.added, [0, 1])
+
+        with patch.object(IntField, 'parse', autospec=True, side_effect=IntField.parse) as mocked_parse:
+            doc.parse(page(('c', 3), ('a', 1), ('b', 2)))
+            self.assertEquals(mocked_parse.call_count, 1)
+
+        self.assertEquals(doc['numbers'], [3, 1, 2])
+        self.assertEquals(doc('numbers').diff.added, [0])
+        self.assertEquals(doc('numbers').diff.removed, [])
+
+        doc.parse(page(('a', 1)))
+        self.assertEquals(doc['numbers'], [1])
+        self.assertEquals(doc('numbers').diff.removed, [0, 2])
+
+
+class IncrementalDictTests(TestCase):
+
+    @istest
+    def reparsing_should_report_added_removed_and_changed_keys(self):
+        class Doc(Document):
+            things = StructuredDictField(
+                '//li', structure=dict(name=TextField('./b'), number=IntField('./i')), key='name', incremental=True)
+
+        doc = Doc(page(('a', 1), ('b', 2)))
+        doc.parse(page(('a', 1), ('b', 20), ('c', 3)))
+
+        self.assertEquals(doc['things']['b']['number'], 20)
+        self.assertEquals(doc('things').diff.added, ['c'])
+        self.assertEquals(doc('things').diff.removed, [])
+        self.assertEquals(doc('things').diff.changed, ['b'])
+
+        doc.parse(page(('c', 3)))
+        self.assertEquals(sorted(doc('things').diff.removed), ['a', 'b'])
+
+    @istest
+    def kept_items_should_not_reference_old_trees(self):
+        class Doc(Document):
+            things = StructuredDictField(
+                '//li', structure=dict(name=TextField('./b'), number=IntField('./i')), key='name', incremental=True)
+
+        doc = Doc(page(('a', 1)))
+        doc.parse(page(('a', 1), ('b', 2)))
+
+        item = doc('things')('a')
+        self.assertIsNone(item.etree)
+        self.assertIsNone(item('name').etree)
+        self.assertIsNone(item('name').source.source._value)
+        self.assertEquals(doc['things']['a'], dict(name='a', number=1))
+
+
+class IncrementalStateTests(TestCase):
+
+    @istest
+    def each_document_should_diff_against_its_own_previous_parse(self):
+        class Doc(Document):
+            numbers = ListField('//li', item=IntField('./i'), incremental=True)
+
+        first, second = Doc(page(('a', 1))), Doc(page(('b', 2)))
+        first.parse(page(('a', 1), ('c', 3)))
+
+        self.assertEquals(first('numbers').diff.added, [1])
+        self.assertEquals(first('numbers').diff.removed, [])
+
+        state = {}
+        Doc(page(('b', 2)), incremental_state=state)
+        doc = Doc(page(('b', 2), ('d', 4)), incremental_state=state)
+        self.assertEquals(doc('numbers').diff.added, [1])
+
+    @istest
+    def identical_rows_should_get_their_own_items(self):
+        class Doc(Document):
+            numbers = ListField('//li', item=IntField('./i'), incremental=True)
+
+            @numbers.map
+            def _count(item, **kwargs):
+                item.counted = getattr(item, 'counted', 0) + 1
+
+        doc = Doc(page(('a', 1), ('a', 1)))
+        self.assertIsNot(doc('numbers')._value[0], doc('numbers')._value[1])
+        self.assertEquals([item.counted for item in doc('numbers')._value], [1, 1])
+
+        doc.parse(page(('a', 1), ('a', 1), ('a', 1)))
+        self.assertEquals(doc['numbers'], [1, 1, 1])
+        self.assertEquals(len(set(id(item) for item in doc('numbers')._value)), 3)
+
+    @istest
+    def nested_fields_should_not_be_incremental(self):
+        numbers = ListField('./i', item=IntField('.'), incremental=True)
+
+        self.assertRaises(ValueError, StructuredDictField, '//li', structure=dict(numbers=numbers), key='name')
+        self.assertRaises(ValueError, ListField, '//ul', item=numbers)
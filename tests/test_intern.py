@@ -0,0 +1,60 @@
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, URLField, StructuredListField, InternPool
+from structominer.util import clean_ascii
+
+
+html = '<ul>{0}</ul>'.format(''.join(
+    '<li><a href="http://example.com/{0}">Story {1}</a> <span>example.com</span></li>'.format(i % 2, i)
+    for i in range(6)))
+
+
+class InternTests(TestCase):
+
+    @istest
+    def interned_fields_should_share_equal_values(self):
+        class Doc(Document):
+            items = StructuredListField('//li', structure=dict(
+                title=TextField('./a'),
+                domain=TextField('./span', intern=True),
+                url=URLField('./a', intern=True)))
+
+        doc = Doc(html)
+        domains = [item['domain'] for item in doc['items']]
+        urls = [item['url'] for item in doc['items']]
+
+        self.assertEquals(domains[0], 'example.com')
+        self.assertTrue(all(domain is domains[0] for domain in domains))
+        self.assertTrue(urls[0] is urls[2] and urls[1] is urls[3])
+        self.assertFalse(urls[0] is urls[1])
+
+    @istest
+    def interning_a_structure_should_intern_its_fields(self):
+        class Doc(Document):
+            items = StructuredListField('//li', structure=dict(domain=TextField('./span')), intern=True)
+
+        self.assertTrue(Doc.items.domain.intern)
+        self.assertTrue(Doc.items.domain.source.intern)
+
+    @istest
+    def interned_text_should_only_be_cleaned_once_per_distinct_value(self):
+        class Doc(Document):
+            items = StructuredListField('//li', structure=dict(domain=TextField('./span')), intern=True)
+
+        with patch('structominer.util.clean_ascii', side_effect=clean_ascii) as mocked_clean:
+            Doc(html)
+            self.assertEquals(mocked_clean.call_count, 1)
+
+    @istest
+    def documents_sharing_a_pool_should_share_values(self):
+        class Doc(Document):
+            domain = TextField('//li[1]/span', intern=True)
+
+        pool = InternPool()
+        first = Doc(html, intern_pool=pool)['domain']
+        second = Doc(html, intern_pool=pool)['domain']
+
+        self.assertTrue(first is second)
+        self.assertEquals(len(pool), 1)
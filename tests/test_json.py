@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, JSONField, StructuredListField, ParsingError
+
+
+html = '''<html><head>
+<script type="application/ld+json">{"@type": "Article", "headline": "Caf\\u00e9 \\u2014 news", "tags": ["a", "b"]}</script>
+<script>window.__STATE__ = {"items": [{"id": 1, "name": "one"}, {"id": 2, "name": "two"}]};
+window.other = 1;</script>
+</head><body></body></html>'''
+
+
+class JSONFieldTests(TestCase):
+
+    @istest
+    def json_should_be_decoded_from_the_selected_script_without_cleaning(self):
+        class Doc(Document):
+            article = JSONField('//script[@type="application/ld+json"]')
+            headline = JSONField('//script[@type="application/ld+json"]', path='headline')
+            second_tag = JSONField('//script[@type="application/ld+json"]', path='tags/1')
+
+        doc = Doc(html)
+
+        self.assertEquals(doc['article']['@type'], 'Article')
+        self.assertEquals(doc['headline'], u'Caf\xe9 — news')
+        self.assertEquals(doc['second_tag'], 'b')
+
+    @istest
+    def json_should_be_decoded_from_selected_text(self):
+        class Doc(Document):
+            headline = JSONField('//script[@type="application/ld+json"]/text()', path='headline')
+
+        self.assertEquals(Doc(html)['headline'], u'Caf\xe9 — news')
+
+    @istest
+    def anchored_json_should_be_decoded_from_the_raw_page_without_a_tree(self):
+        class Doc(Document):
+            items = JSONField(anchor=r'window\.__STATE__\s*=', path='items')
+            second_name = JSONField(anchor=r'window\.__STATE__\s*=', path='items/1/name')
+
+        with patch('structominer.page.etree.HTML') as mocked_html:
+            doc = Doc(html)
+            self.assertFalse(mocked_html.called)
+
+        self.assertEquals(doc['items'][0], {'id': 1, 'name': 'one'})
+        self.assertEquals(doc['second_name'], 'two')
+
+    @istest
+    def anchor_can_select_within_a_script(self):
+        class Doc(Document):
+            state = JSONField('//script[not(@type)]', anchor=r'__STATE__\s*=', path='items/0/id')
+
+        self.assertEquals(Doc(html)['state'], 1)
+
+    @istest
+    def missing_json_should_fail_unless_optional(self):
+        class Doc(Document):
+            optional = JSONField(anchor=r'window\.__MISSING__\s*=')
+
+        class StrictDoc(Document):
+            strict = JSONField('//script[@type="application/ld+json"]', path='missing', optional=False)
+
+        self.assertEquals(Doc(html)['optional'], None)
+        self.assertRaises(ParsingError, StrictDoc, html)
+
+    @istest
+    def anchored_json_should_work_within_structures(self):
+        class Doc(Document):
+            scripts = StructuredListField('//script[not(@type)]', structure=dict(
+                first_id=JSONField('.', anchor=r'window\.__STATE__\s*=', path='items/0/id')))
+
+        doc = Doc(html)
+
+        self.assertEquals(doc['scripts'], [{'first_id': 1}])
+        self.assertTrue(doc('scripts')(0)('first_id').anchor is Doc.scripts.first_id.anchor)
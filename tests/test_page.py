@@ -0,0 +1,71 @@
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, ListField, Page, Region
+from structominer import page as page_module
+
+
+html = '''<html><body>
+<ul id="items"><li>a</li><li>b</li></ul>
+<p class="next">2</p>
+</body></html>'''
+
+
+class Listing(Document):
+    items = ListField('//ul[@id="items"]/li', item=TextField('.'))
+
+
+class Pagination(Document):
+    next_page = TextField('//p[@class="next"]')
+    items = ListField('//ul[@id="items"]/li', item=TextField('.'))
+
+
+class RegionListing(Document):
+    region = Region(id='items')
+    items = ListField('//li', item=TextField('.'))
+
+
+class PageTests(TestCase):
+
+    @istest
+    def documents_should_share_the_tree_of_a_page(self):
+        with patch.object(page_module.etree, 'HTML', side_effect=page_module.etree.HTML) as mocked_html:
+            listing, pagination = Page(html).parse(Listing, Pagination)
+            self.assertEquals(mocked_html.call_count, 1)
+
+        self.assertIs(listing.etree, pagination.etree)
+        self.assertIs(listing.page, pagination.page)
+        self.assertEquals(listing['items'], ['a', 'b'])
+        self.assertEquals(pagination['items'], ['a', 'b'])
+        self.assertEquals(pagination['next_page'], '2')
+
+    @istest
+    def identical_selections_from_the_root_should_be_evaluated_once(self):
+        page = Page(html)
+        with patch.object(page_module, 'compile_xpath', side_effect=page_module.compile_xpath) as mocked_compile:
+            Listing(page)
+            Pagination(page)
+            selectors = [call[0][0] for call in mocked_compile.call_args_list]
+
+        self.assertEquals(selectors.count('//ul[@id="items"]/li'), 1)
+
+    @istest
+    def documents_with_regions_should_get_their_own_tree(self):
+        page = Page(html)
+        listing, region_listing = page.parse(Listing, RegionListing)
+
+        self.assertIsNot(listing.etree, region_listing.etree)
+        self.assertTrue(region_listing.region_found)
+        self.assertEquals(region_listing['items'], ['a', 'b'])
+
+    @istest
+    def documents_should_parse_a_page_like_its_html(self):
+        doc = Pagination()
+        doc.parse(Page(html))
+        self.assertEquals(doc.html, html)
+        self.assertEquals(doc['next_page'], '2')
+
+        doc.parse(html)
+        self.assertIsNone(doc.page)
+        self.assertEquals(doc['items'], ['a', 'b'])
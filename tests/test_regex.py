@@ -0,0 +1,79 @@
+from mock import patch
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, RegexField, StructuredTextField, StructuredListField, ParsingError
+
+
+html = '''<ul>
+<li><span id="score_123">42 points</span> by <a>pg</a> <em>3  hours ago</em></li>
+<li><span id="score_456">discuss</span></li>
+</ul>'''
+
+
+class RegexFieldTests(TestCase):
+
+    @istest
+    def named_groups_should_be_converted_into_a_dict(self):
+        class Doc(Document):
+            meta = RegexField('//li[1]', r'(?P<points>\d+) points\s+by\s+(?P<user>\w+)\s+(?P<age>\d+)\s+(?P<unit>\w)',
+                              types=dict(points=int, age=int))
+
+        self.assertEquals(Doc(html)['meta'], dict(points=42, user='pg', age=3, unit='h'))
+
+    @istest
+    def single_groups_and_whole_matches_should_be_returned_directly(self):
+        class Doc(Document):
+            item_id = RegexField('//li[1]/span/@id', r'_(\d+)', types=int)
+            points = RegexField('//li[1]/span', r'\d+')
+            age = RegexField('//li[1]/em', r'(\d+)\s+(\w)')
+
+        doc = Doc(html)
+        self.assertEquals(doc['item_id'], 123)
+        self.assertEquals(doc['points'], '42')
+        self.assertEquals(doc['age'], ('3', 'h'))
+
+    @istest
+    def patterns_should_run_on_raw_text_without_cleaning(self):
+        class Doc(Document):
+            age = RegexField('//li[1]/em', r'\d+  hours')
+
+        with patch('structominer.fields.clean_ascii') as mocked_clean:
+            self.assertEquals(Doc(html)['age'], '3  hours')
+            self.assertFalse(mocked_clean.called)
+
+    @istest
+    def missing_matches_should_fail_unless_optional(self):
+        class Doc(Document):
+            points = RegexField('//li[2]/span', r'(\d+) points', types=int)
+
+        class StrictDoc(Document):
+            points = RegexField('//li[2]/span', r'(\d+) points', types=int, optional=False)
+
+        self.assertEquals(Doc(html)['points'], None)
+        self.assertRaises(ParsingError, StrictDoc, html)
+
+    @istest
+    def structured_text_field_should_accept_a_pattern(self):
+        class Doc(Document):
+            text = StructuredTextField('//li[1]/em')
+            age = StructuredTextField('//li[1]/em', pattern=r'(\d+)', types=int)
+
+        doc = Doc(html)
+        self.assertEquals(doc['text'], '3 hours ago')
+        self.assertEquals(doc['age'], 3)
+
+
+class RegexFieldItemTests(TestCase):
+
+    @istest
+    def regex_fields_should_work_within_structured_lists(self):
+        class Doc(Document):
+            items = StructuredListField('//li', structure=dict(
+                item_id=RegexField('./span/@id', r'_(\d+)', types=int),
+                points=RegexField('./span', r'(\d+) points')))
+
+        doc = Doc(html)
+
+        self.assertEquals(doc['items'], [{'item_id': 123, 'points': '42'}, {'item_id': 456, 'points': None}])
+        self.assertTrue(doc('items')(0)('points').pattern is Doc.items.points.pattern)
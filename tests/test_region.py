@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, ListField, Region
+
+
+html = '''<html><head><script>var s = "<div id='main'>";</script></head><body>
+<div class="nav"><p>Home</p></div>
+<div data-id="main"><p>Decoy</p></div>
+<div id="main" class="content wide"><p>First</p><div><p>Nested</p></div><br/><p>Last</p></div>
+<div class="footer"><p>Footer</p></div>
+</body></html>'''
+
+
+class RegionTests(TestCase):
+
+    @istest
+    def region_should_slice_the_container_by_id(self):
+        self.assertEquals(Region(id='main').extract(html),
+                          '<div id="main" class="content wide"><p>First</p><div><p>Nested</p></div><br/><p>Last</p></div>')
+
+    @istest
+    def region_should_slice_the_container_by_class(self):
+        self.assertTrue(Region(cls='content').extract(html).startswith('<div id="main"'))
+        self.assertTrue(Region(cls='footer').extract(html).endswith('<p>Footer</p></div>'))
+
+    @istest
+    def markers_should_match_pages_of_either_string_type(self):
+        page = '<p>Caf\xc3\xa9</p><div id="main"><p>Menu</p></div>'
+
+        self.assertEquals(Region(start=u'<div id="main"', end=u'</div>').extract(page),
+                          '<div id="main"><p>Menu</p></div>')
+        self.assertEquals(Region(start='<div id="main"').extract(page.decode('utf-8')),
+                          u'<div id="main"><p>Menu</p></div>')
+        self.assertEquals(Region(start=u'<p>Th\xe9</p>').extract(page), None)
+
+    @istest
+    def region_should_slice_between_markers(self):
+        self.assertEquals(Region(start='<div class="footer">', end='</div>').extract(html),
+                          '<div class="footer"><p>Footer</p></div>')
+        self.assertEquals(Region(start='<div class="missing">').extract(html), None)
+
+    @istest
+    def document_should_only_parse_its_region(self):
+        class Doc(Document):
+            region = Region(id='main')
+            paragraphs = ListField('//p', item=TextField('.'))
+
+        doc = Doc(html)
+
+        self.assertTrue(doc.region_found)
+        self.assertEquals(doc['paragraphs'], ['First', 'Nested', 'Last'])
+
+    @istest
+    def document_should_parse_the_whole_page_without_its_region(self):
+        class Doc(Document):
+            region = Region(id='missing')
+            paragraphs = ListField('//p', item=TextField('.'))
+
+        doc = Doc(html)
+
+        self.assertFalse(doc.region_found)
+        self.assertEquals(len(doc['paragraphs']), 6)
+
+    @istest
+    def region_should_keep_the_page_charset(self):
+        class Doc(Document):
+            region = Region(id='main')
+            text = TextField('//div[@id="main"]')
+
+        page = u'<html><head><meta charset="iso-8859-1"></head><body><div id="main">caf\xe9</div></body></html>'
+        doc = Doc(page.encode('iso-8859-1'))
+
+        self.assertEquals(doc['text'], 'cafe')
+
+    @istest
+    def region_should_be_parsed_despite_an_unknown_charset(self):
+        class Doc(Document):
+            region = Region(id='main')
+            text = TextField('//div[@id="main"]')
+
+        doc = Doc('<html><head><meta charset="x-foo-bar"></head><body><div id="main">plain</div></body></html>')
+
+        self.assertTrue(doc.region_found)
+        self.assertEquals(doc['text'], 'plain')
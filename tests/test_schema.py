@@ -0,0 +1,133 @@
+import cPickle as pickle
+import multiprocessing
+
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import (Document, TextField, IntField, ElementField, ParsedValue, Schema, StructuredListField,
+                          Budget, ResultCache)
+
+
+html = '<ul><li><b>(one)</b> <i>1 point</i></li><li><b>(two)</b> <i>2 points</i></li></ul>'
+
+
+class Listing(Document):
+    first = TextField('//li[1]/b')
+    items = StructuredListField('//li', structure=dict(name=TextField('./b'), points=IntField('./i')))
+
+    @items.name.postprocessor
+    def _strip_parens(value, **kwargs):
+        return value[1:-1]
+
+    @items.points.preprocessor
+    def _extract_points(value, **kwargs):
+        return value.split(' ')[0]
+
+
+class Unparsed(Document):
+    first = TextField('//li[1]/b')
+    items = StructuredListField('//li', structure=dict(name=TextField('./b')))
+
+
+_worker_schema = None
+
+
+def load_schema(schema):
+    global _worker_schema
+    _worker_schema = schema
+    schema.document_class()
+
+
+def parse_with_schema(html):
+    return _worker_schema.parse(html)
+
+
+class SchemaTests(TestCase):
+
+    @istest
+    def schema_should_rebuild_an_equivalent_document_after_pickling(self):
+        schema = pickle.loads(pickle.dumps(Schema(Listing), pickle.HIGHEST_PROTOCOL))
+        doc = schema.parse(html)
+
+        self.assertEquals(doc['items'], [{'name': 'one', 'points': 1}, {'name': 'two', 'points': 2}])
+        self.assertTrue(doc.items._item_ is doc.items.item)
+        self.assertTrue(schema.document_class() is schema.document_class())
+
+    @istest
+    def schema_should_reference_processors_by_qualified_name(self):
+        self.assertTrue('tests.test_schema:Listing._strip_parens' in repr(Schema(Listing).fields))
+
+    @istest
+    def schema_should_refuse_unreferenceable_processors(self):
+        class Doc(Document):
+            title = TextField('//h1')
+        Doc.title.postprocessor(lambda value, **kwargs: value)
+
+        self.assertRaises(ValueError, Schema, Doc)
+
+    @istest
+    def parsed_documents_should_pickle_as_values(self):
+        doc = Listing(html)
+        data = pickle.dumps(doc, pickle.HIGHEST_PROTOCOL)
+        restored = pickle.loads(data)
+
+        self.assertNotIn('etree', data)
+        self.assertEquals(restored['items'], doc['items'])
+        self.assertTrue(isinstance(restored('items'), ParsedValue))
+        self.assertFalse(restored.incomplete)
+
+    @istest
+    def documents_holding_elements_should_not_pickle(self):
+        class Doc(Document):
+            element = ElementField('//li/b')
+
+        self.assertRaises(pickle.PicklingError, pickle.dumps, Doc(html), pickle.HIGHEST_PROTOCOL)
+
+    @istest
+    def unparsed_documents_should_pickle_with_empty_values(self):
+        restored = pickle.loads(pickle.dumps(Unparsed(), pickle.HIGHEST_PROTOCOL))
+
+        self.assertEquals(restored['first'], None)
+        self.assertEquals(restored['items'], None)
+
+    @istest
+    def partial_documents_should_pickle_as_incomplete(self):
+        doc = Listing(html, budget=Budget(items=1), allow_partial=True)
+        restored = pickle.loads(pickle.dumps(doc, pickle.HIGHEST_PROTOCOL))
+
+        self.assertTrue(restored.incomplete)
+        self.assertEquals(restored.budget_error.args, doc.budget_error.args)
+        self.assertEquals(restored['items'], [{'name': 'one', 'points': 1}])
+
+    @istest
+    def workers_should_parse_with_a_shipped_schema(self):
+        pool = multiprocessing.Pool(2, initializer=load_schema, initargs=(Schema(Listing),))
+        try:
+            docs = pool.map(parse_with_schema, [html] * 2)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertEquals(docs[1]['first'], '(one)')
+        self.assertEquals(docs[1]['items'][1], {'name': 'two', 'points': 2})
+
+    @istest
+    def copies_of_a_schema_should_share_their_document_class(self):
+        first = pickle.loads(pickle.dumps(Schema(Listing), pickle.HIGHEST_PROTOCOL))
+        second = pickle.loads(pickle.dumps(Schema(Listing), pickle.HIGHEST_PROTOCOL))
+
+        self.assertTrue(first.document_class() is second.document_class())
+
+    @istest
+    def schema_should_carry_the_document_options(self):
+        class Doc(Listing):
+            cache = ResultCache()
+            budget = Budget(items=10)
+            allow_partial = True
+
+        document_class = pickle.loads(pickle.dumps(Schema(Doc), pickle.HIGHEST_PROTOCOL)).document_class()
+
+        self.assertEquals(document_class.budget.items, 10)
+        self.assertTrue(document_class.allow_partial)
+        self.assertTrue(isinstance(document_class.cache, ResultCache))
+        self.assertEquals(document_class(html)['first'], '(one)')
@@ -0,0 +1,42 @@
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, IntField, URLField, StructuredListField
+from structominer.selectors import compile_xpath, css_to_xpath
+
+
+html = '''<div class="listing">
+<div class="item"><a class="title" href="/one">One</a> <span class="score">1</span></div>
+<div class="item featured"><a class="title" href="/two">Two</a> <span class="score">2</span></div>
+</div>'''
+
+
+class SelectorTests(TestCase):
+
+    @istest
+    def fields_should_accept_css_selectors(self):
+        class Doc(Document):
+            featured = TextField('div.item.featured a.title', css=True)
+            items = StructuredListField('.listing > .item', css=True, structure=dict(
+                title=TextField('a.title', css=True),
+                url=URLField('a', css=True),
+                score=IntField('span.score', css=True)))
+
+        doc = Doc(html)
+
+        self.assertEquals(doc['featured'], 'Two')
+        self.assertEquals(doc['items'], [{'title': 'One', 'url': '/one', 'score': 1},
+                                         {'title': 'Two', 'url': '/two', 'score': 2}])
+
+    @istest
+    def css_fields_should_share_translated_and_compiled_selectors(self):
+        class Doc1(Document):
+            title = TextField('a.title', css=True)
+
+        class Doc2(Document):
+            title = TextField('a.title', css=True)
+
+        selector = unicode(Doc1.title)
+        self.assertEquals(selector, unicode(Doc2.title))
+        self.assertTrue(css_to_xpath('a.title') is css_to_xpath('a.title'))
+        self.assertTrue(compile_xpath(selector) is compile_xpath(selector))
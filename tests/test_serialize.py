@@ -0,0 +1,105 @@
+import json
+from StringIO import StringIO
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import (Document, TextField, IntField, DateField, ElementField, ListField, StructuredDictField,
+                          ResultCache)
+from structominer.serialize import dump_json, dump_ndjson, dump_msgpack, msgpack
+
+
+html = '''<h1>Title</h1><time>2014-03-01</time>
+<ul><li><b>one</b> <i>1</i> <i>10</i></li><li><b>two</b> <i>2</i></li></ul>'''
+
+
+def make_doc():
+    class Doc(Document):
+        title = TextField('//h1')
+        date = DateField('//time')
+        numbers = ListField('//i', item=IntField('.'))
+        things = StructuredDictField('//li', structure=dict(
+            name=TextField('./b'),
+            numbers=ListField('./i', item=IntField('.'))), key='name')
+    return Doc
+
+
+expected = {
+    'title': 'Title',
+    'date': '2014-03-01',
+    'numbers': [1, 10, 2],
+    'things': {'one': {'name': 'one', 'numbers': [1, 10]}, 'two': {'name': 'two', 'numbers': [2]}},
+}
+
+
+class SerializeTests(TestCase):
+
+    @istest
+    def json_output_should_match_the_document_values(self):
+        output = StringIO()
+        dump_json(make_doc()(html), output)
+
+        self.assertEquals(json.loads(output.getvalue()), expected)
+
+    @istest
+    def json_output_should_be_written_as_it_goes(self):
+        output = StringIO()
+        with patch.object(output, 'write', wraps=output.write) as mocked_write:
+            dump_json(make_doc()(html), output)
+            self.assertTrue(mocked_write.call_count > 1)
+
+        self.assertEquals(json.loads(output.getvalue()), expected)
+
+    @istest
+    def cached_documents_should_serialize_the_same(self):
+        Doc = make_doc()
+        cache = ResultCache()
+        Doc(html, cache=cache)
+        output = StringIO()
+        dump_ndjson([Doc(html, cache=cache), Doc(html, cache=cache)], output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEquals(len(lines), 2)
+        self.assertEquals(json.loads(lines[1]), expected)
+
+    @istest
+    def msgpack_output_should_match_the_document_values(self):
+        if msgpack is None:
+            raise SkipTest('msgpack is not installed')
+        output = StringIO()
+        dump_msgpack(make_doc()(html), output)
+
+        self.assertEquals(msgpack.unpackb(output.getvalue()), expected)
+
+    @istest
+    def fields_not_parsed_automatically_should_be_left_out(self):
+        class Doc(make_doc()):
+            heading = TextField('//h1', auto_parse=False)
+
+        output = StringIO()
+        dump_json(Doc(html), output)
+
+        self.assertEquals(json.loads(output.getvalue()), expected)
+
+    @istest
+    def documents_that_cant_be_serialized_should_not_leave_partial_lines(self):
+        class Broken(Document):
+            title = TextField('//h1')
+            heading = ElementField('//h1')
+
+        output = StringIO()
+        with self.assertRaises(TypeError):
+            dump_ndjson([make_doc()(html), Broken(html)], output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEquals(len(lines), 1)
+        self.assertEquals(json.loads(lines[0]), expected)
+
+    @istest
+    def unparsed_documents_should_serialize_as_nulls(self):
+        output = StringIO()
+        dump_json(make_doc()(), output)
+
+        self.assertEquals(json.loads(output.getvalue()), dict.fromkeys(expected))
@@ -0,0 +1,75 @@
+import multiprocessing
+
+from nose.tools import istest
+from unittest import TestCase
+
+from structominer import Document, TextField, IntField, ElementField, ListField, ParsedValue, StructuredListField
+
+
+html = '<ul>{0}</ul>'.format(''.join('<li><b>n{0}</b> <i>{0}</i></li>'.format(i) for i in range(50)))
+
+
+def _parse_in_worker(html):
+    class Doc(Document):
+        items = StructuredListField(
+            '//li', structure=dict(number=IntField('./i')), processes=2, shard_threshold=10)
+
+    doc = Doc(html)
+    return isinstance(doc('items')(0), ParsedValue), doc['items']
+
+
+class ShardedListTests(TestCase):
+
+    @istest
+    def sharded_list_should_match_in_process_parsing(self):
+        def make_doc(**kwargs):
+            class Doc(Document):
+                items = StructuredListField(
+                    '//li', structure=dict(name=TextField('./b'), number=IntField('./i')), **kwargs)
+
+                @items.number.postprocessor
+                def _double(value, **kwargs):
+                    return value * 2
+
+                @items.filter
+                def _odd_only(value, **kwargs):
+                    return value['number'] % 4 == 2
+            return Doc
+
+        sharded = make_doc(processes=2, shard_threshold=10, shard_size=7)(html)
+        in_process = make_doc()(html)
+
+        self.assertEquals(len(sharded['items']), 25)
+        self.assertEquals(sharded['items'], in_process['items'])
+        self.assertTrue(isinstance(sharded('items')(0), ParsedValue))
+        self.assertEquals(sharded('items')(3)['name'], 'n7')
+
+    @istest
+    def short_lists_should_be_parsed_in_process(self):
+        class Doc(Document):
+            items = StructuredListField(
+                '//li', structure=dict(number=IntField('./i')), processes=2, shard_threshold=100)
+
+        doc = Doc(html)
+        self.assertFalse(isinstance(doc('items')(0), ParsedValue))
+        self.assertEquals(doc['items'][49]['number'], 49)
+
+    @istest
+    def element_items_should_be_parsed_in_process(self):
+        class Doc(Document):
+            elements = ListField('//li', item=ElementField('./b'), processes=2, shard_threshold=5)
+
+        doc = Doc(html)
+        self.assertEquals([element.text for element in doc['elements']], ['n{0}'.format(i) for i in range(50)])
+        self.assertFalse(isinstance(doc('elements')(0), ParsedValue))
+
+    @istest
+    def lists_in_daemonic_workers_should_be_parsed_in_process(self):
+        pool = multiprocessing.Pool(1)
+        try:
+            sharded, items = pool.apply(_parse_in_worker, (html,))
+        finally:
+            pool.terminate()
+
+        self.assertFalse(sharded)
+        self.assertEquals([item['number'] for item in items], range(50))